@@ -0,0 +1,133 @@
+"""Results grid benchmark: raw rows vs. ResultPage-backed rows on one 500-row page.
+
+    python benchmarks/bench_result_page.py [rows] [repeats]
+
+"raw" is how pages used to reach the grid (DataTable.add_rows with the fetched
+tuples); "page" is ResultPage + ResultGrid. For each it reports the Python heap
+retained by the grid after loading a page, the time to load it, and the time to
+render every row once (what scrolling through the page costs, repeated with the
+DataTable render cache invalidated in between).
+"""
+import asyncio
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from textual.app import App, ComposeResult  # noqa: E402
+from textual.widgets import DataTable  # noqa: E402
+
+from db2tui import ResultGrid, ResultPage  # noqa: E402
+
+HEADERS = ["ORDER_ID", "CUSTNO", "STATUS", "WAREHOUSE", "AMOUNT", "QTY", "CREATED", "NOTE", "DESCRIPTION"]
+DESCRIPTION = [
+    ("ORDER_ID", frozenset({"INTEGER"})),
+    ("CUSTNO", frozenset({"CHAR"})),
+    ("STATUS", frozenset({"CHAR"})),
+    ("WAREHOUSE", frozenset({"CHAR"})),
+    ("AMOUNT", frozenset({"DECIMAL"})),
+    ("QTY", frozenset({"INTEGER"})),
+    ("CREATED", frozenset({"TIMESTAMP"})),
+    ("NOTE", frozenset({"VARCHAR"})),
+    ("DESCRIPTION", frozenset({"CHAR"})),
+]
+
+
+def make_rows(count: int, seed: int = 1):
+    """Rows shaped like ibm_db_dbi returns them: padded CHARs, Decimals, timestamps, NULLs"""
+    rng = random.Random(seed)
+    base = datetime(2024, 1, 1)
+    rows = []
+    for i in range(count):
+        rows.append((
+            100000 + i,
+            f"C{rng.randrange(200):05d}".ljust(10),
+            rng.choice("ONHCX"),
+            rng.choice(["WH01", "WH02", "WH03"]).ljust(8),
+            Decimal(rng.randrange(100, 1000000)) / 100,
+            rng.randrange(1, 20),
+            base + timedelta(minutes=rng.randrange(500000)),
+            None if rng.random() < 0.6 else f"note {rng.randrange(50)}",
+            f"Item {rng.randrange(40)}".ljust(50),
+        ))
+    return rows
+
+
+class BenchApp(App):
+    def compose(self) -> ComposeResult:
+        yield DataTable(id="raw")
+        yield ResultGrid(id="page")
+
+
+def load_raw(dt: DataTable, rows):
+    dt.clear(columns=True)
+    dt.add_columns(*HEADERS)
+    dt.add_rows(rows)
+
+
+def load_page(dt: ResultGrid, rows):
+    page = ResultPage(HEADERS, rows, DESCRIPTION)
+    dt.load_page(page, [str(i) for i in range(page.row_count)])
+
+
+def render_all(dt: DataTable, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        dt._row_renderable_cache.clear()
+        for index in range(dt.row_count):
+            dt._get_row_renderables(index)
+    return (time.perf_counter() - start) / repeats
+
+
+async def measure(row_count: int, repeats: int):
+    app = BenchApp()
+    results = {}
+    async with app.run_test() as pilot:
+        for name, loader in (("raw", load_raw), ("page", load_page)):
+            dt = app.query_one(f"#{name}")
+            loader(dt, make_rows(row_count, seed=2))  # warm up imports and caches
+            await pilot.pause()
+            dt.clear(columns=True)
+            gc.collect()
+
+            rows = make_rows(row_count)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                loader(dt, rows)
+            load_time = (time.perf_counter() - start) / repeats
+            del rows
+            dt.clear(columns=True)
+            gc.collect()
+
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            loader(dt, make_rows(row_count))
+            gc.collect()
+            retained = tracemalloc.get_traced_memory()[0] - before
+            tracemalloc.stop()
+
+            await pilot.pause()
+            results[name] = (retained, load_time, render_all(dt, repeats))
+    return results
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    results = asyncio.run(measure(row_count, repeats))
+    print(f"{row_count} rows x {len(HEADERS)} columns, load and render averaged over {repeats} passes")
+    print(f"{'':6} {'retained KiB':>13} {'load ms':>9} {'render ms':>10}")
+    for name, (retained, load_time, render_time) in results.items():
+        print(f"{name:6} {retained / 1024:13.1f} {load_time * 1000:9.1f} {render_time * 1000:10.1f}")
+    raw, page = results["raw"], results["page"]
+    print(f"page/raw: memory {page[0] / raw[0]:.2f}x, load {page[1] / raw[1]:.2f}x, render {page[2] / raw[2]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,516 @@
+"""DB2TUI query agent.
+
+Runs on the IBM i next to ibm_db_dbi and serves queries to a remote DB2TUI over
+TCP, so the TUI itself can run on a workstation:
+
+    python db2agent.py --port 50555 --token SECRET          # on the IBM i
+    DB2TUI_AGENT=ibmi:50555 DB2TUI_AGENT_TOKEN=SECRET python db2tui.py
+
+The agent binds to 127.0.0.1 by default; reach it through an SSH tunnel
+(ssh -L 50555:localhost:50555 ibmi) or pass --host explicitly. Clients must always
+present the token (loopback is shared by every user of the IBM i); without
+--token or $DB2TUI_AGENT_TOKEN a random one is generated and printed at startup.
+For local testing `--sqlite PATH` serves a SQLite database instead of DB2.
+
+Wire format: every frame is a 5-byte header (payload length, kind) followed by
+the payload, zlib-compressed when large. Requests and small replies are JSON;
+result rows travel as column-major binary batches (see encode_batch). The hello
+frame that carries the token is small and never compressed.
+"""
+import argparse
+import datetime
+import hmac
+import json
+import os
+import secrets
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from decimal import Decimal
+
+# ═══════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═══════════════════════════════════════════════════════════════════
+DEFAULT_PORT = 50555
+BATCH_ROWS = 1000              # Rows per streamed batch
+COMPRESS_MIN_BYTES = 512       # Compress payloads at least this large
+MAX_FRAME_BYTES = 256 * 1024 * 1024  # Largest frame payload, after decompression
+MAX_HELLO_BYTES = 4096         # Largest frame accepted before the client has authenticated
+
+FRAME_HEADER = struct.Struct(">IB")
+KIND_JSON = 1
+KIND_BATCH = 2
+FLAG_COMPRESSED = 0x80
+
+# Column encodings inside a batch
+COL_NULL = 0
+COL_INT = 1
+COL_FLOAT = 2
+COL_TEXT = 3
+COL_DECIMAL = 4
+COL_DATETIME = 5
+COL_DATE = 6
+COL_TIME = 7
+COL_BYTES = 8
+COL_BOOL = 9
+
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+class AgentError(Exception):
+    """Error reported by the agent or a broken agent connection"""
+
+
+# ═══════════════════════════════════════════════════════════════════
+# FRAMING
+# ═══════════════════════════════════════════════════════════════════
+def _recv_exact(sock, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(min(size - len(buf), 1 << 20))
+        if not chunk:
+            raise AgentError("Connection closed by peer")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def send_frame(sock, kind: int, payload: bytes, compress: bool = True):
+    if compress and len(payload) >= COMPRESS_MIN_BYTES:
+        payload = zlib.compress(payload, 1)
+        kind |= FLAG_COMPRESSED
+    sock.sendall(FRAME_HEADER.pack(len(payload), kind) + payload)
+
+
+def recv_frame(sock, max_bytes: int = None, allow_compressed: bool = True):
+    """Return (kind, payload) of the next frame.
+
+    Payloads larger than max_bytes (MAX_FRAME_BYTES by default), before or after
+    decompression, are refused without being buffered in full.
+    """
+    max_bytes = MAX_FRAME_BYTES if max_bytes is None else max_bytes
+    size, kind = FRAME_HEADER.unpack(_recv_exact(sock, FRAME_HEADER.size))
+    if size > max_bytes:
+        raise AgentError(f"Frame too large: {size} bytes")
+    if kind & FLAG_COMPRESSED and not allow_compressed:
+        raise AgentError("Compressed frame not allowed here")
+    payload = _recv_exact(sock, size)
+    if kind & FLAG_COMPRESSED:
+        inflater = zlib.decompressobj()
+        try:
+            payload = inflater.decompress(payload, max_bytes)
+        except zlib.error as e:
+            raise AgentError(f"Corrupt frame: {e}")
+        if inflater.unconsumed_tail:
+            raise AgentError(f"Frame too large: over {max_bytes} bytes decompressed")
+    return kind & ~FLAG_COMPRESSED, payload
+
+
+def send_json(sock, message: dict, compress: bool = True):
+    send_frame(sock, KIND_JSON, json.dumps(message, default=str).encode("utf-8"), compress)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# COLUMNAR BATCH ENCODING
+# ═══════════════════════════════════════════════════════════════════
+def _array_bytes(values: array) -> bytes:
+    if not _BIG_ENDIAN:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _array_from(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if not _BIG_ENDIAN:
+        values.byteswap()
+    return values
+
+
+def _column_encoding(values) -> int:
+    kinds = {type(v) for v in values if v is not None}
+    if not kinds:
+        return COL_NULL
+    if len(kinds) > 1:
+        return COL_TEXT
+    kind = kinds.pop()
+    if kind is bool:
+        return COL_BOOL
+    if kind is int:
+        if all(-(1 << 63) <= v < (1 << 63) for v in values if v is not None):
+            return COL_INT
+        return COL_DECIMAL
+    if kind is float:
+        return COL_FLOAT
+    if kind is Decimal:
+        return COL_DECIMAL
+    if kind is datetime.datetime:
+        return COL_DATETIME
+    if kind is datetime.date:
+        return COL_DATE
+    if kind is datetime.time:
+        return COL_TIME
+    if kind in (bytes, bytearray, memoryview):
+        return COL_BYTES
+    return COL_TEXT
+
+
+def _encode_blobs(blobs) -> bytes:
+    lengths = array("I", (len(b) for b in blobs))
+    return _array_bytes(lengths) + b"".join(blobs)
+
+
+def _decode_blobs(data: bytes, pos: int, count: int):
+    lengths = _array_from("I", data[pos:pos + 4 * count])
+    pos += 4 * count
+    blobs = []
+    for length in lengths:
+        blobs.append(data[pos:pos + length])
+        pos += length
+    return blobs, pos
+
+
+def encode_batch(rows, column_count: int) -> bytes:
+    """Encode rows column by column: per column an encoding byte, a null bitmap and
+    the packed non-null values (fixed-width arrays for numbers, length-prefixed
+    UTF-8 for everything else)."""
+    row_count = len(rows)
+    out = [struct.pack(">II", row_count, column_count)]
+    for col in range(column_count):
+        values = [row[col] for row in rows]
+        encoding = _column_encoding(values)
+        nulls = bytearray((row_count + 7) // 8)
+        present = []
+        for i, value in enumerate(values):
+            if value is None:
+                nulls[i >> 3] |= 1 << (i & 7)
+            else:
+                present.append(value)
+        out.append(bytes((encoding,)))
+        out.append(bytes(nulls))
+        if encoding in (COL_INT, COL_BOOL):
+            out.append(_array_bytes(array("q", (int(v) for v in present))))
+        elif encoding == COL_FLOAT:
+            out.append(_array_bytes(array("d", present)))
+        elif encoding == COL_BYTES:
+            out.append(_encode_blobs([bytes(v) for v in present]))
+        elif encoding in (COL_DATETIME, COL_DATE, COL_TIME):
+            out.append(_encode_blobs([v.isoformat().encode("ascii") for v in present]))
+        elif encoding != COL_NULL:
+            out.append(_encode_blobs([str(v).encode("utf-8") for v in present]))
+    return b"".join(out)
+
+
+_DECODERS = {
+    COL_TEXT: lambda b: b.decode("utf-8"),
+    COL_DECIMAL: lambda b: Decimal(b.decode("ascii")),
+    COL_DATETIME: lambda b: datetime.datetime.fromisoformat(b.decode("ascii")),
+    COL_DATE: lambda b: datetime.date.fromisoformat(b.decode("ascii")),
+    COL_TIME: lambda b: datetime.time.fromisoformat(b.decode("ascii")),
+    COL_BYTES: bytes,
+}
+
+
+def decode_batch(data: bytes):
+    """Decode a batch produced by encode_batch back into a list of row tuples"""
+    row_count, column_count = struct.unpack_from(">II", data)
+    pos = 8
+    columns = []
+    for _ in range(column_count):
+        encoding = data[pos]
+        pos += 1
+        nulls = data[pos:pos + (row_count + 7) // 8]
+        pos += len(nulls)
+        is_null = [bool(nulls[i >> 3] & (1 << (i & 7))) for i in range(row_count)]
+        count = row_count - sum(is_null)
+        if encoding in (COL_INT, COL_BOOL, COL_FLOAT):
+            typecode = "d" if encoding == COL_FLOAT else "q"
+            present = _array_from(typecode, data[pos:pos + 8 * count])
+            pos += 8 * count
+            if encoding == COL_BOOL:
+                present = [bool(v) for v in present]
+        elif encoding == COL_NULL:
+            present = []
+        else:
+            blobs, pos = _decode_blobs(data, pos, count)
+            present = [_DECODERS[encoding](b) for b in blobs]
+        values = iter(present)
+        columns.append([None if null else next(values) for null in is_null])
+    return list(zip(*columns)) if column_count else [()] * row_count
+
+
+def encode_description(description):
+    """Make a cursor description JSON-safe; frozenset type objects become name lists"""
+    if not description:
+        return None
+    encoded = []
+    for entry in description:
+        type_code = entry[1]
+        if isinstance(type_code, frozenset):
+            type_code = sorted(str(t) for t in type_code)
+        elif type_code is not None:
+            type_code = str(type_code)
+        encoded.append([entry[0], type_code] + [
+            v if isinstance(v, (int, bool)) or v is None else str(v) for v in entry[2:7]
+        ])
+    return encoded
+
+
+def decode_description(encoded):
+    if not encoded:
+        return None
+    return [
+        tuple([e[0], frozenset(e[1]) if isinstance(e[1], list) else e[1]] + list(e[2:]))
+        for e in encoded
+    ]
+
+
+# ═══════════════════════════════════════════════════════════════════
+# AGENT (SERVER SIDE)
+# ═══════════════════════════════════════════════════════════════════
+class AgentHandler(socketserver.BaseRequestHandler):
+    """Serves one TUI session on its own database connection"""
+
+    def handle(self):
+        sock = self.request
+        server = self.server
+        try:
+            # Unauthenticated peers get a few KB, never a decompression buffer
+            kind, payload = recv_frame(sock, MAX_HELLO_BYTES, allow_compressed=False)
+            hello = json.loads(payload) if kind == KIND_JSON else {}
+            if hello.get("op") != "hello" or not hmac.compare_digest(
+                str(hello.get("token", "")).encode("utf-8"), server.token.encode("utf-8")
+            ):
+                send_json(sock, {"ok": False, "error": "Authentication failed"})
+                return
+            conn = server.connection_factory()
+        except Exception as e:
+            send_json(sock, {"ok": False, "error": str(e)})
+            return
+
+        cursors = {}
+        send_json(sock, {"ok": True})
+        try:
+            while True:
+                kind, payload = recv_frame(sock)
+                request = json.loads(payload)
+                try:
+                    self.dispatch(sock, conn, cursors, request)
+                except Exception as e:
+                    send_json(sock, {"ok": False, "error": str(e)})
+                if request.get("op") == "close":
+                    break
+        except AgentError:
+            pass
+        finally:
+            try:
+                conn.rollback()
+                conn.close()
+            except Exception:
+                pass
+
+    def dispatch(self, sock, conn, cursors, request):
+        op = request.get("op")
+        if op == "execute":
+            cursor = cursors.get(request["cursor"])
+            if cursor is None:
+                cursor = cursors[request["cursor"]] = conn.cursor()
+            params = request.get("params")
+            if params:
+                cursor.execute(request["sql"], tuple(params))
+            else:
+                cursor.execute(request["sql"])
+            send_json(sock, {
+                "ok": True,
+                "description": encode_description(cursor.description),
+                "rowcount": getattr(cursor, "rowcount", -1),
+            })
+        elif op == "fetch":
+            # Stream batches until one is shorter than BATCH_ROWS (or size rows were sent)
+            cursor = cursors[request["cursor"]]
+            remaining = request.get("size")
+            column_count = len(cursor.description or ())
+            while True:
+                size = BATCH_ROWS if remaining is None else min(BATCH_ROWS, remaining)
+                rows = cursor.fetchmany(size) if size else []
+                send_frame(sock, KIND_BATCH, encode_batch(rows, column_count))
+                if remaining is not None:
+                    remaining -= len(rows)
+                if len(rows) < BATCH_ROWS or remaining == 0:
+                    break
+        elif op == "close_cursor":
+            cursor = cursors.pop(request["cursor"], None)
+            if cursor is not None:
+                cursor.close()
+            send_json(sock, {"ok": True})
+        elif op in ("commit", "rollback"):
+            getattr(conn, op)()
+            send_json(sock, {"ok": True})
+        elif op == "close":
+            send_json(sock, {"ok": True})
+        else:
+            send_json(sock, {"ok": False, "error": f"Unknown operation: {op}"})
+
+
+class QueryAgent(socketserver.ThreadingTCPServer):
+    """TCP server handing each client session its own database connection"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, connection_factory, token: str):
+        if not token:
+            raise ValueError("The agent requires a non-empty token")
+        self.connection_factory = connection_factory
+        self.token = token
+        super().__init__(address, AgentHandler)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# REMOTE BACKEND (CLIENT SIDE, DB-API SUBSET USED BY DB2Client)
+# ═══════════════════════════════════════════════════════════════════
+class RemoteConnection:
+    """DB-API style connection whose statements run on a DB2TUI agent"""
+
+    def __init__(self, host: str, port: int = DEFAULT_PORT, token: str = "", timeout=None):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.lock = threading.Lock()
+        self._next_cursor = 0
+        self.request({"op": "hello", "token": token}, compress=False)
+
+    def request(self, message: dict, compress: bool = True) -> dict:
+        with self.lock:
+            send_json(self.sock, message, compress)
+            return self._reply()
+
+    def _reply(self) -> dict:
+        kind, payload = recv_frame(self.sock)
+        if kind != KIND_JSON:
+            raise AgentError("Unexpected batch frame")
+        reply = json.loads(payload)
+        if not reply.get("ok"):
+            raise AgentError(reply.get("error", "Agent error"))
+        return reply
+
+    def fetch(self, cursor_id: int, size=None):
+        rows = []
+        with self.lock:
+            send_json(self.sock, {"op": "fetch", "cursor": cursor_id, "size": size})
+            while True:
+                kind, payload = recv_frame(self.sock)
+                if kind == KIND_JSON:
+                    reply = json.loads(payload)
+                    raise AgentError(reply.get("error", "Agent error"))
+                batch = decode_batch(payload)
+                rows.extend(batch)
+                if size is not None:
+                    size -= len(batch)
+                if len(batch) < BATCH_ROWS or size == 0:
+                    return rows
+
+    def cursor(self):
+        self._next_cursor += 1
+        return RemoteCursor(self, self._next_cursor)
+
+    def commit(self):
+        self.request({"op": "commit"})
+
+    def rollback(self):
+        self.request({"op": "rollback"})
+
+    def close(self):
+        try:
+            self.request({"op": "close"})
+        finally:
+            self.sock.close()
+
+
+class RemoteCursor:
+    """Cursor proxy: execute() is one round trip, fetches stream columnar batches"""
+
+    def __init__(self, connection: RemoteConnection, cursor_id: int):
+        self.connection = connection
+        self.cursor_id = cursor_id
+        self.description = None
+        self.rowcount = -1
+        self._buffer = []
+
+    def execute(self, sql, params=None):
+        reply = self.connection.request({
+            "op": "execute", "cursor": self.cursor_id, "sql": sql,
+            "params": list(params) if params else None,
+        })
+        self.description = decode_description(reply.get("description"))
+        self.rowcount = reply.get("rowcount", -1)
+        self._buffer = []
+
+    def fetchall(self):
+        if not self.description:
+            return []
+        rows = self._buffer + self.connection.fetch(self.cursor_id)
+        self._buffer = []
+        return rows
+
+    def fetchmany(self, size=1):
+        if not self.description:
+            return []
+        if len(self._buffer) < size:
+            self._buffer += self.connection.fetch(self.cursor_id, size - len(self._buffer))
+        rows, self._buffer = self._buffer[:size], self._buffer[size:]
+        return rows
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def close(self):
+        self.connection.request({"op": "close_cursor", "cursor": self.cursor_id})
+
+
+def parse_address(address: str):
+    """Split 'host:port' (port optional) into (host, port)"""
+    host, _, port = address.rpartition(":") if ":" in address else (address, "", "")
+    return host, int(port) if port else DEFAULT_PORT
+
+
+def remote_connection_factory(address: str, token: str = ""):
+    """Zero-argument factory for DB2Client(connection_factory=...)"""
+    host, port = parse_address(address)
+    return lambda: RemoteConnection(host, port, token)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DB2TUI query agent")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--token", default=os.environ.get("DB2TUI_AGENT_TOKEN", ""),
+                        help="Shared secret clients must present (default: $DB2TUI_AGENT_TOKEN, "
+                             "else a random token printed at startup)")
+    parser.add_argument("--sqlite", metavar="PATH", help="Serve a SQLite database instead of DB2 (testing)")
+    args = parser.parse_args(argv)
+
+    if args.sqlite:
+        import sqlite3
+        connection_factory = lambda: sqlite3.connect(args.sqlite, check_same_thread=False)
+    else:
+        import ibm_db_dbi
+        connection_factory = ibm_db_dbi.connect
+
+    token = args.token or secrets.token_urlsafe(24)
+
+    with QueryAgent((args.host, args.port), connection_factory, token) as server:
+        print(f"DB2TUI agent listening on {args.host}:{server.server_address[1]}", flush=True)
+        if not args.token:
+            print(f"Generated token (set DB2TUI_AGENT_TOKEN on the client): {token}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,37 @@
+import hashlib
+import json
+import math
 import os
-import ibm_db_dbi as db
+import random
+import re
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from collections.abc import MutableMapping
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+try:
+    import ibm_db_dbi as db
+except ImportError:  # Workstation install talking to a remote agent (see db2agent.py)
+    db = None
+from array import array
+from decimal import Decimal
+from rich.text import Text
 from textual.app import App, ComposeResult
-from textual.widgets import Header, Footer, Input, DataTable, ListView, ListItem, Label, Static, Button, TextArea
-from textual.containers import Vertical, Container, Center
+from textual.widgets import Header, Footer, Input, DataTable, ListView, ListItem, Label, Static, Button, TextArea, Log
+from textual.containers import Vertical, VerticalScroll, Container, Center
 from textual.binding import Binding
 from textual.screen import ModalScreen
-from textual import on
+from textual import on, work
+from textual.worker import get_current_worker
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
+from db2agent import remote_connection_factory
 
 # ************ VERSION 0.1 ******************
 
@@ -21,6 +44,30 @@ os.environ["LANG"] = "en_US.UTF-8"
 # CONFIGURATION
 # ═══════════════════════════════════════════════════════════════════
 MAX_AUTO_EXECUTE_LENGTH = 200  # Don't auto-execute SQL longer than this
+AGENT_ADDRESS = os.environ.get("DB2TUI_AGENT", "")  # host:port of a db2agent.py; empty = local ibm_db_dbi
+AGENT_TOKEN = os.environ.get("DB2TUI_AGENT_TOKEN", "")
+NULL_DISPLAY = "NULL"          # How NULL cells are shown in the results grid
+WATCH_INTERVAL_SECONDS = 5     # Re-run interval for watch mode ([w])
+SIDEBAR_MAX_ITEMS = 200        # Table list entries materialized at once (the window slides as you scroll)
+PROFILE_DISTINCT_SQL = "APPROX_COUNT_DISTINCT({})"  # Falls back to COUNT(DISTINCT ...) if unsupported
+PROFILE_SAMPLE_ROWS_THRESHOLD = 10_000_000  # Profile a random sample of tables larger than this
+PROFILE_SAMPLE_PERCENT = 1.0   # Sample size used above the threshold
+HISTORY_DB_PATH = Path.home() / ".db2tui_history.db"  # Persistent query history (SQLite)
+HISTORY_RESULTS = 100          # Entries shown in the history recall dialog (Ctrl+R)
+LOG_MAX_LINES = 100            # Lines kept in the message panel
+COMPLETION_MAX_SUGGESTIONS = 8  # Suggestions listed under the editor (Ctrl+N accepts the first)
+PREVIEW_SAMPLE_METHOD = "RRN"  # Sampled preview ([m]): "RRN" (random record numbers) or "TABLESAMPLE"
+PREVIEW_MAX_COLUMNS = 40       # Sampled preview projects only the first N columns of wider tables
+PREVIEW_OVERSAMPLE = 1.5       # Sample this many times the page size, then keep a random page of it
+PREVIEW_MAX_RRNS = 2000        # RRN sampling needing more record numbers (many deleted records) uses TABLESAMPLE
+SCRIPT_JOURNAL_PATH = Path.home() / ".db2tui_journal.json"  # Script checkpoints for resume (Ctrl+G)
+SCRIPT_CHECKPOINT_EVERY = 100  # Commit + checkpoint a running script every N statements
+SCRIPT_PROGRESS_SECONDS = 1.0  # Pass a running script's log/history/results to the UI at least this often
+CONNECTION_POOL_SIZE = 4       # Extra connections used for parallel table comparison ([d])
+COMPARE_CHUNKS = 32            # Key ranges each table is split into for comparison
+COMPARE_MAX_DIFFERENCES = 1000  # Stop drilling down after this many differing rows
+# Per-row 64-bit hash over derived table R; summed per chunk. Adjust if HASH_ROW is unavailable.
+COMPARE_ROW_HASH_SQL = "INTERPRET(SUBSTR(HASH_ROW(R), 1, 8) AS BIGINT)"
 
 # ═══════════════════════════════════════════════════════════════════
 # DEBUG SETTINGS
@@ -45,17 +92,26 @@ COLOR_STATUS_BG = "#003366"         # Status bar background
 COLOR_PAGINATION_BG = "#004400"     # Pagination bar background
 COLOR_ABOUT_BORDER = "#ff8800"      # About dialog border (orange)
 COLOR_LISTVIEW_TEXT = "#00ff00"     # ListView/TreeView text color (green)
+COLOR_CHANGED_CELL = "#ffff00"      # Cells changed since the last watch refresh (yellow)
 
 
 class DB2Client:
-    def __init__(self):
+    def __init__(self, connection_factory=None):
+        # Any zero-argument callable returning a DB-API connection; lets a local
+        # stand-in serve canned catalog rows instead of ibm_db_dbi
+        self.connection_factory = connection_factory or (db.connect if db else None)
         self.conn = None
         self.cursor = None
         self.last_query = ""
+        self.last_description = None
+        # Serialises cursor use between the UI thread and background workers
+        self.lock = threading.RLock()
         
     def connect(self):
+        if self.connection_factory is None:
+            return False, "ibm_db_dbi is not installed - set DB2TUI_AGENT=host:port to use a remote agent"
         try:
-            self.conn = db.connect()
+            self.conn = self.connection_factory()
             self.cursor = self.conn.cursor()
             return True, "Connected to DB2"
         except Exception as e:
@@ -71,22 +127,169 @@ class DB2Client:
         except Exception as e:
             return False, str(e)
     
+    def rollback(self):
+        """Roll back the current transaction"""
+        try:
+            if self.conn:
+                self.conn.rollback()
+                return True, "Transaction rolled back"
+            return False, "No connection"
+        except Exception as e:
+            return False, str(e)
+    
     def get_tables(self, lib):
         try:
-            self.cursor.execute(
-                "SELECT TABLE_NAME FROM QSYS2.SYSTABLES WHERE TABLE_SCHEMA = ? ORDER BY TABLE_NAME",
-                (lib.upper(),)
-            )
-            return [r[0] for r in self.cursor.fetchall()]
+            with self.lock:
+                self.cursor.execute(
+                    "SELECT TABLE_NAME FROM QSYS2.SYSTABLES WHERE TABLE_SCHEMA = ? ORDER BY TABLE_NAME",
+                    (lib.upper(),)
+                )
+                return [r[0] for r in self.cursor.fetchall()]
         except Exception as e:
             return []
     
+    def get_key_columns(self, lib, table):
+        """Get primary key column names of a table, in key order"""
+        try:
+            with self.lock:
+                self.cursor.execute(
+                    "SELECT K.COLUMN_NAME FROM QSYS2.SYSKEYCST K "
+                    "JOIN QSYS2.SYSCST C ON C.CONSTRAINT_SCHEMA = K.CONSTRAINT_SCHEMA "
+                    "AND C.CONSTRAINT_NAME = K.CONSTRAINT_NAME "
+                    "WHERE C.CONSTRAINT_TYPE = 'PRIMARY KEY' AND C.TABLE_SCHEMA = ? AND C.TABLE_NAME = ? "
+                    "ORDER BY K.ORDINAL_POSITION",
+                    (lib.upper(), table.upper())
+                )
+                return [r[0] for r in self.cursor.fetchall()]
+        except Exception:
+            return []
+    
+    def get_index_advice(self, lib, table):
+        """Get index advice recorded by the optimizer in QSYS2.SYSIXADV"""
+        try:
+            with self.lock:
+                self.cursor.execute(
+                    "SELECT KEY_COLUMNS_ADVISED, INDEX_TYPE, TIMES_ADVISED, LAST_ADVISED, "
+                    "REASON_ADVISED, AVERAGE_QUERY_ESTIMATE "
+                    "FROM QSYS2.SYSIXADV WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ? "
+                    "ORDER BY TIMES_ADVISED DESC",
+                    (lib.upper(), table.upper())
+                )
+                return self.cursor.fetchall()
+        except Exception:
+            return []
+    
+    def get_indexes(self, lib, table):
+        """Get existing indexes and key constraints as {name: [key columns]}"""
+        try:
+            with self.lock:
+                self.cursor.execute(
+                    "SELECT I.INDEX_NAME, K.COLUMN_NAME, K.ORDINAL_POSITION "
+                    "FROM QSYS2.SYSINDEXES I JOIN QSYS2.SYSKEYS K "
+                    "ON K.INDEX_SCHEMA = I.INDEX_SCHEMA AND K.INDEX_NAME = I.INDEX_NAME "
+                    "WHERE I.TABLE_SCHEMA = ? AND I.TABLE_NAME = ? "
+                    "UNION ALL "
+                    "SELECT C.CONSTRAINT_NAME, K.COLUMN_NAME, K.ORDINAL_POSITION "
+                    "FROM QSYS2.SYSCST C JOIN QSYS2.SYSKEYCST K "
+                    "ON K.CONSTRAINT_SCHEMA = C.CONSTRAINT_SCHEMA AND K.CONSTRAINT_NAME = C.CONSTRAINT_NAME "
+                    "WHERE C.CONSTRAINT_TYPE IN ('PRIMARY KEY', 'UNIQUE') "
+                    "AND C.TABLE_SCHEMA = ? AND C.TABLE_NAME = ? "
+                    "ORDER BY 1, 3",
+                    (lib.upper(), table.upper(), lib.upper(), table.upper())
+                )
+                indexes = {}
+                for name, column, _ in self.cursor.fetchall():
+                    indexes.setdefault(name, []).append(column)
+                return indexes
+        except Exception:
+            return {}
+    
+    def get_row_estimate(self, lib, table):
+        """Get the catalog row count estimate (no table scan), or None"""
+        try:
+            with self.lock:
+                self.cursor.execute(
+                    "SELECT SUM(NUMBER_ROWS) FROM QSYS2.SYSTABLESTAT WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ?",
+                    (lib.upper(), table.upper())
+                )
+                row = self.cursor.fetchone()
+                return int(row[0]) if row and row[0] is not None else None
+        except Exception:
+            return None
+    
+    def get_row_stats(self, lib, table):
+        """Get (row estimate or None, deleted record slots) from one catalog read.
+        Deleted slots keep their RRNs, so RRN sampling has to draw over both."""
+        try:
+            with self.lock:
+                self.cursor.execute(
+                    "SELECT SUM(NUMBER_ROWS), SUM(NUMBER_DELETED_ROWS) FROM QSYS2.SYSTABLESTAT "
+                    "WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ?",
+                    (lib.upper(), table.upper())
+                )
+                row = self.cursor.fetchone()
+                if not row or row[0] is None:
+                    return None, 0
+                return int(row[0]), int(row[1] or 0)
+        except Exception:
+            return None, 0
+    
+    def get_columns(self, lib, table):
+        """Get [(column name, data type)] of a table in ordinal order"""
+        try:
+            with self.lock:
+                self.cursor.execute(
+                    "SELECT COLUMN_NAME, DATA_TYPE FROM QSYS2.SYSCOLUMNS "
+                    "WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ? ORDER BY ORDINAL_POSITION",
+                    (lib.upper(), table.upper())
+                )
+                return [(r[0], str(r[1]).strip()) for r in self.cursor.fetchall()]
+        except Exception:
+            return []
+    
+    def get_query_columns(self, sql):
+        """Get [(column name, data type)] of a query's result from its cursor description"""
+        try:
+            with self.lock:
+                self.cursor.execute(f"SELECT * FROM ({sql}) T FETCH FIRST 1 ROWS ONLY")
+                description = self.cursor.description or []
+                self.cursor.fetchall()
+                return [(d[0], d[1]) for d in description]
+        except Exception:
+            return []
+    
+    def get_libraries(self):
+        """Get all library (schema) names"""
+        try:
+            with self.lock:
+                self.cursor.execute("SELECT SCHEMA_NAME FROM QSYS2.SYSSCHEMAS")
+                return [r[0] for r in self.cursor.fetchall()]
+        except Exception:
+            return []
+    
+    def get_library_columns(self, lib):
+        """Get {table: [columns]} for every table in a library with one catalog query"""
+        try:
+            with self.lock:
+                self.cursor.execute(
+                    "SELECT TABLE_NAME, COLUMN_NAME FROM QSYS2.SYSCOLUMNS "
+                    "WHERE TABLE_SCHEMA = ? ORDER BY TABLE_NAME, ORDINAL_POSITION",
+                    (lib.upper(),)
+                )
+                tables = {}
+                for table, column in self.cursor.fetchall():
+                    tables.setdefault(table, []).append(column)
+                return tables
+        except Exception:
+            return {}
+    
     def get_table_count(self, lib, table):
         """Get total row count for a table"""
         try:
             sql = f"SELECT COUNT(*) FROM {lib}.{table}"
-            self.cursor.execute(sql)
-            return self.cursor.fetchone()[0]
+            with self.lock:
+                self.cursor.execute(sql)
+                return self.cursor.fetchone()[0]
         except:
             return 0
     
@@ -107,54 +310,71 @@ class DB2Client:
                 ) WHERE RN > {offset} FETCH FIRST {limit} ROWS ONLY
                 """
             
-            self.last_query = paginated_sql
-            self.cursor.execute(paginated_sql)
-            
-            if self.cursor.description:
-                headers = [d[0] for d in self.cursor.description]
-                if headers and headers[0] == 'RN':
-                    headers = headers[1:]
-                    rows = [row[1:] for row in self.cursor.fetchall()]
-                else:
-                    rows = self.cursor.fetchall()
-                return headers, rows, None
-            
-            return [], [], "Query executed successfully (no results)"
+            with self.lock:
+                self.last_query = paginated_sql
+                self.cursor.execute(paginated_sql)
+                
+                if self.cursor.description:
+                    description = list(self.cursor.description)
+                    headers = [d[0] for d in description]
+                    if headers and headers[0] == 'RN':
+                        headers = headers[1:]
+                        description = description[1:]
+                        rows = [row[1:] for row in self.cursor.fetchall()]
+                    else:
+                        rows = self.cursor.fetchall()
+                    self.last_description = description
+                    return headers, rows, None
+                
+                return [], [], "Query executed successfully (no results)"
         except Exception as e:
             return [], [], str(e)
     
-    def run_query(self, sql):
+    def run_query(self, sql, params=None):
         """Simple query execution without pagination"""
         try:
-            self.cursor.execute(sql)
-            if self.cursor.description:
-                return [d[0] for d in self.cursor.description], self.cursor.fetchall(), None
-            return [], [], "Success"
+            with self.lock:
+                if params:
+                    self.cursor.execute(sql, tuple(params))
+                else:
+                    self.cursor.execute(sql)
+                if self.cursor.description:
+                    return [d[0] for d in self.cursor.description], self.cursor.fetchall(), None
+                return [], [], "Success"
         except Exception as e:
             return [], [], str(e)
     
+    def clone(self):
+        """Return a new client with its own connection from the same connection factory"""
+        other = DB2Client(self.connection_factory)
+        status, msg = other.connect()
+        if not status:
+            raise ConnectionError(msg)
+        return other
+    
     def execute_batch(self, sql_script):
         """Execute multiple SQL statements separated by semicolons"""
         results = []
         try:
             statements = self._split_sql_statements(sql_script)
             
-            for stmt in statements:
-                stmt = stmt.strip()
-                if not stmt or not self._is_executable(stmt):
-                    continue
+            with self.lock:
+                for stmt in statements:
+                    stmt = stmt.strip()
+                    if not stmt or not self._is_executable(stmt):
+                        continue
                 
-                self.cursor.execute(stmt)
+                    self.cursor.execute(stmt)
                 
-                if self._needs_commit(stmt):
-                    self.conn.commit()
+                    if self._needs_commit(stmt):
+                        self.conn.commit()
                 
-                if self.cursor.description:
-                    headers = [d[0] for d in self.cursor.description]
-                    rows = self.cursor.fetchall()
-                    results.append((stmt, headers, rows, None))
-                else:
-                    results.append((stmt, [], [], "Success"))
+                    if self.cursor.description:
+                        headers = [d[0] for d in self.cursor.description]
+                        rows = self.cursor.fetchall()
+                        results.append((stmt, headers, rows, None))
+                    else:
+                        results.append((stmt, [], [], "Success"))
             
             return results
         except Exception as e:
@@ -180,12 +400,910 @@ class DB2Client:
         return first_word in keywords
 
 
+# DB-API type names (as found in ibm_db_dbi type objects) grouped by how the grid shows them
+_NUMERIC_TYPE_NAMES = frozenset((
+    "NUMBER", "NUMERIC", "DECIMAL", "DEC", "INT", "INTEGER", "SMALLINT", "BIGINT",
+    "FLOAT", "REAL", "DOUBLE", "DECFLOAT",
+))
+_BINARY_TYPE_NAMES = frozenset(("BINARY", "VARBINARY", "BLOB", "CHAR () FOR BIT DATA", "ROWID"))
+# Types MIN/MAX/DISTINCT cannot be applied to
+_LOB_TYPE_NAMES = frozenset(("BLOB", "CLOB", "DBCLOB", "XML", "DATALINK"))
+
+
+def _type_names(type_code) -> set:
+    """Upper-case type names for a description type code (ibm_db_dbi uses frozensets)"""
+    if isinstance(type_code, frozenset):
+        return {str(n).upper() for n in type_code}
+    if type_code is not None:
+        return {str(type_code).upper()}
+    return set()
+
+
+def _column_kind(type_code, sample=None) -> str:
+    """Classify a column as 'number', 'binary' or 'text' from its description type code.
+
+    ibm_db_dbi reports type codes as frozenset-based type objects; anything else
+    (plain strings, None) falls back to the Python type of a sample value.
+    """
+    names = _type_names(type_code)
+    if names & _NUMERIC_TYPE_NAMES:
+        return "number"
+    if names & _BINARY_TYPE_NAMES:
+        return "binary"
+    if isinstance(sample, (int, float, Decimal)) and not isinstance(sample, bool):
+        return "number"
+    if isinstance(sample, (bytes, bytearray, memoryview)):
+        return "binary"
+    return "text"
+
+
+_NULL_CELL = Text(NULL_DISPLAY, style="dim", no_wrap=True, end="")
+
+
+class ResultPage:
+    """One page of query results, pre-formatted column by column for the grid.
+
+    Each column is dictionary-encoded: the distinct values are formatted once into
+    display strings and every row stores a small integer code into that column's
+    dictionary (an ``array``), so repeated values such as status codes are formatted
+    and held in memory only once. CHAR padding is trimmed on the way in. Rich
+    ``Text`` cells are only built when the grid renders a row (see PageRow).
+    """
+    def __init__(self, headers, rows, description=None):
+        self.headers = list(headers)
+        self.row_count = len(rows)
+        self.kinds = []
+        self.justify = []
+        self.dictionaries = []
+        self.codes = []
+        for col in range(len(self.headers)):
+            values = [row[col] for row in rows]
+            type_code = description[col][1] if description and col < len(description) else None
+            sample = next((v for v in values if v is not None), None)
+            kind = _column_kind(type_code, sample)
+            dictionary, codes = self._encode_column(values, kind)
+            self.kinds.append(kind)
+            self.justify.append("right" if kind == "number" else "left")
+            self.dictionaries.append(dictionary)
+            self.codes.append(codes)
+
+    @staticmethod
+    def _format_value(value, kind: str) -> str:
+        if isinstance(value, str):
+            return value.rstrip()
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return bytes(value).hex().upper()
+        if kind == "number" and isinstance(value, float):
+            return repr(value)
+        return str(value)
+
+    def _encode_column(self, values, kind):
+        """Format a whole column at once, caching each distinct value's display string
+        (None stays None for NULL)."""
+        cache = {}
+        dictionary = []
+        codes = array("I")
+        for value in values:
+            # Decimal('1.0') == Decimal('1.00') but they display differently
+            key = value.as_tuple() if isinstance(value, Decimal) else value
+            code = cache.get(key) if key.__hash__ is not None else None
+            if code is None:
+                code = len(dictionary)
+                dictionary.append(None if value is None else self._format_value(value, kind))
+                if key.__hash__ is not None:
+                    cache[key] = code
+            codes.append(code)
+        # Pages are small, so codes nearly always fit in one or two bytes
+        typecode = "B" if len(dictionary) <= 0xFF else "H" if len(dictionary) <= 0xFFFF else "I"
+        return dictionary, array(typecode, codes)
+
+    def value(self, row: int, col: int):
+        """Display string of a cell, or None for NULL"""
+        return self.dictionaries[col][self.codes[col][row]]
+
+    def plain(self, row: int, col: int) -> str:
+        value = self.value(row, col)
+        return NULL_DISPLAY if value is None else value
+
+    def cell(self, row: int, col: int) -> Text:
+        value = self.value(row, col)
+        if value is None:
+            return _NULL_CELL
+        return Text(value, justify=self.justify[col], no_wrap=True, end="")
+
+    def row_keys(self, key_indexes, offset: int = 0):
+        """Grid row keys: key column values, or absolute row numbers when there is no
+        usable key (none given, or the key values are not unique in this page)."""
+        if key_indexes:
+            keys = ["\x1f".join(self.plain(row, col) for col in key_indexes)
+                    for row in range(self.row_count)]
+            if len(set(keys)) == len(keys):
+                return keys
+        return [str(offset + row) for row in range(self.row_count)]
+
+    def diff(self, previous: "ResultPage", keys, previous_keys):
+        """Compare with the previous page of the same query.
+
+        Returns (added, removed, changed): row indexes only in this page, keys only
+        in the previous page, and (row, col) cells whose display value changed.
+        """
+        previous_rows = {key: row for row, key in enumerate(previous_keys)}
+        current = set(keys)
+        added, changed = [], []
+        for row, key in enumerate(keys):
+            prev_row = previous_rows.get(key)
+            if prev_row is None:
+                added.append(row)
+                continue
+            for col in range(len(self.headers)):
+                if self.value(row, col) != previous.value(prev_row, col):
+                    changed.append((row, col))
+        removed = [key for key in previous_keys if key not in current]
+        return added, removed, changed
+
+
+class PageRow(MutableMapping):
+    """One results grid row read straight from a ResultPage.
+
+    Takes the place of DataTable's per-row {column key: cell} dict, so the page's
+    column arrays stay the only copy of the rows. Cells set through update_cell
+    (watch highlights) are kept as per-row overrides until the row is rebound.
+    """
+    __slots__ = ("page", "index", "columns", "overrides")
+
+    def __init__(self, page: ResultPage, index: int, columns: dict):
+        self.page = page
+        self.index = index
+        self.columns = columns      # {column key: page column}, shared by every row
+        self.overrides = None
+
+    def __getitem__(self, column_key):
+        if self.overrides and column_key in self.overrides:
+            return self.overrides[column_key]
+        return self.page.cell(self.index, self.columns[column_key])
+
+    def __setitem__(self, column_key, value):
+        if self.overrides is None:
+            self.overrides = {}
+        self.overrides[column_key] = value
+
+    def __delitem__(self, column_key):
+        if self.overrides:
+            self.overrides.pop(column_key, None)
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.columns)
+
+
+_SQL_NAME = r'(?:"[^"]+"|[A-Z_#@$][A-Z0-9_#@$]*)'
+_FROM_TABLE_RE = re.compile(rf'\bFROM\s+(?:({_SQL_NAME})[./])?({_SQL_NAME})', re.IGNORECASE)
+_WHERE_CLAUSE_RE = re.compile(
+    r'\bWHERE\b(.*?)(?=\bGROUP\s+BY\b|\bORDER\s+BY\b|\bHAVING\b|\bFETCH\b|\bLIMIT\b|\bOFFSET\b|\bUNION\b|$)',
+    re.IGNORECASE | re.DOTALL
+)
+_PREDICATE_RE = re.compile(
+    rf'(?:{_SQL_NAME}\.)?({_SQL_NAME})\s*(=|<>|!=|<=|>=|<|>|\bLIKE\b|\bIN\b|\bBETWEEN\b|\bIS\b)',
+    re.IGNORECASE
+)
+_SQL_KEYWORDS = frozenset(("AND", "OR", "NOT", "NULL", "WHERE", "EXISTS", "CASE", "WHEN", "THEN", "ELSE", "END"))
+
+
+def _unquote(name: str) -> str:
+    return name[1:-1] if name.startswith('"') else name.upper()
+
+
+def sql_target_table(sql: str, default_lib: str = ""):
+    """Return (library, table) of the first FROM in sql, or None"""
+    match = _FROM_TABLE_RE.search(sql or "")
+    if not match:
+        return None
+    lib = _unquote(match.group(1)) if match.group(1) else default_lib
+    return lib, _unquote(match.group(2))
+
+
+def sql_predicate_columns(sql: str):
+    """Return [(column, operator)] for the simple predicates in the first WHERE clause"""
+    match = _WHERE_CLAUSE_RE.search(sql or "")
+    if not match:
+        return []
+    clause = re.sub(r"'(?:[^']|'')*'", "''", match.group(1))
+    predicates = []
+    for column, op in _PREDICATE_RE.findall(clause):
+        column = _unquote(column)
+        if column not in _SQL_KEYWORDS and (column, op.upper()) not in predicates:
+            predicates.append((column, op.upper()))
+    return predicates
+
+
+class IndexAdvisor:
+    """Explains index support for a query from the DB2 catalog.
+
+    Catalog facts (optimizer advice, existing indexes, row estimate) are cached per
+    table; predicate analysis of the SQL text is cheap and done on every call.
+    """
+    def __init__(self, client: DB2Client):
+        self.client = client
+        self.cache = {}
+
+    def table_facts(self, lib: str, table: str, refresh: bool = False):
+        key = (lib.upper(), table.upper())
+        if refresh or key not in self.cache:
+            self.cache[key] = {
+                "advice": self.client.get_index_advice(lib, table),
+                "indexes": self.client.get_indexes(lib, table),
+                "rows": self.client.get_row_estimate(lib, table),
+            }
+        return self.cache[key]
+
+    def analyze(self, sql: str, lib: str, table: str, refresh: bool = False):
+        """Return a report dict for sql against lib.table"""
+        facts = self.table_facts(lib, table, refresh)
+        leading = {cols[0] for cols in facts["indexes"].values() if cols}
+        keyed = {c for cols in facts["indexes"].values() for c in cols}
+        predicates = []
+        for column, op in sql_predicate_columns(sql):
+            if column in leading and op not in ("<>", "!=", "LIKE", "IS"):
+                support = "index"
+                scanned = None
+            elif column in keyed:
+                support = "non-leading key"
+                scanned = facts["rows"]
+            else:
+                support = "none"
+                scanned = facts["rows"]
+            predicates.append((column, op, support, scanned))
+        return {
+            "lib": lib.upper(),
+            "table": table.upper(),
+            "sql": sql,
+            "rows": facts["rows"],
+            "advice": facts["advice"],
+            "indexes": facts["indexes"],
+            "predicates": predicates,
+            "full_scan": not predicates or all(p[2] != "index" for p in predicates),
+        }
+
+
+class NameIndex:
+    """Case-insensitive prefix and substring lookup over a list of names.
+
+    Built once per list: names are kept sorted so a prefix is a bisect range, and a
+    trigram posting list narrows substring searches to a handful of candidates.
+    Pass substring=False for very large prefix-only lists to skip the trigram build.
+    """
+    def __init__(self, names, substring: bool = True):
+        self.names = sorted(set(names), key=str.upper)
+        self.keys = [n.upper() for n in self.names]
+        self.substring = substring
+        self.trigrams = {}
+        if substring:
+            for pos, key in enumerate(self.keys):
+                for gram in {key[i:i + 3] for i in range(len(key) - 2)}:
+                    self.trigrams.setdefault(gram, array("I")).append(pos)
+
+    def __len__(self):
+        return len(self.names)
+
+    def prefix_range(self, prefix: str):
+        """Return (lo, hi) so that self.names[lo:hi] all start with prefix"""
+        prefix = prefix.upper()
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + "\uffff", lo)
+        return lo, hi
+
+    def starting_with(self, prefix: str, limit: int):
+        lo, hi = self.prefix_range(prefix)
+        return self.names[lo:min(hi, lo + limit)]
+
+    def search(self, text: str):
+        """Return positions matching text: prefix matches first, then other substring matches"""
+        text = text.strip().upper()
+        if not text:
+            return range(len(self.names))
+        lo, hi = self.prefix_range(text)
+        if len(text) >= 3 and self.substring:
+            grams = sorted((self.trigrams.get(text[i:i + 3], ()) for i in range(len(text) - 2)), key=len)
+            candidates = set(grams[0]).intersection(*grams[1:]) if grams[0] else set()
+            others = sorted(p for p in candidates if not lo <= p < hi and text in self.keys[p])
+        else:
+            others = [p for p, key in enumerate(self.keys) if not lo <= p < hi and text in key]
+        return list(range(lo, hi)) + others
+
+
+def _quote_ident(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def build_profile_sql(source: str, columns, sample_percent=None, distinct_sql=PROFILE_DISTINCT_SQL) -> str:
+    """Build one aggregate query profiling every column of source in a single pass.
+
+    source is a table reference (LIB.TABLE) or a parenthesised query. The result is
+    one row: COUNT(*), then per column COUNT, MIN, MAX and (approximate) distinct
+    count; LOB-like columns only get COUNT.
+    """
+    exprs = ["COUNT(*)"]
+    for name, data_type in columns:
+        col = f"T.{_quote_ident(name)}"
+        exprs.append(f"COUNT({col})")
+        if _type_names(data_type) & (_LOB_TYPE_NAMES | {"TEXT"}):
+            exprs.extend(["CAST(NULL AS VARCHAR(1))"] * 2 + ["CAST(NULL AS BIGINT)"])
+        else:
+            exprs.extend([f"MIN({col})", f"MAX({col})", distinct_sql.format(col)])
+    sql = f"SELECT {', '.join(exprs)} FROM {source} T"
+    if sample_percent:
+        sql += f" WHERE RAND() < {sample_percent / 100}"
+    return sql
+
+
+class ColumnProfiler:
+    """Per-column count/null/min/max/distinct statistics from one server round trip.
+
+    Profiles are cached per table (or per query text for ad-hoc queries).
+    """
+    HEADERS = ["COLUMN", "TYPE", "COUNT", "NULLS", "NULL %", "MIN", "MAX", "DISTINCT~"]
+
+    def __init__(self, client: DB2Client):
+        self.client = client
+        self.cache = {}
+
+    def profile(self, lib: str = "", table: str = "", sql: str = "", refresh: bool = False, client=None):
+        """Profile lib.table, or the result of sql when no table is given.
+
+        client is the DB2Client to run on (self.client by default); the aggregate
+        scans the whole table, so the app gives it a connection of its own.
+        Returns (rows, note, error) where rows follow HEADERS.
+        """
+        client = client or self.client
+        key = (lib.upper(), table.upper()) if table else sql
+        if not refresh and key in self.cache:
+            rows, note = self.cache[key]
+            return rows, note + " (cached)", None
+        
+        sample_percent = None
+        if table:
+            source = f"{lib}.{table}"
+            columns = client.get_columns(lib, table)
+            estimate = client.get_row_estimate(lib, table)
+            if estimate and estimate > PROFILE_SAMPLE_ROWS_THRESHOLD:
+                sample_percent = PROFILE_SAMPLE_PERCENT
+        else:
+            source = f"({sql})"
+            columns = client.get_query_columns(sql)
+        if not columns:
+            return [], "", f"No columns found for {source}"
+        
+        headers, result, err = client.run_query(build_profile_sql(source, columns, sample_percent))
+        if err and PROFILE_DISTINCT_SQL != "COUNT(DISTINCT {})":
+            headers, result, err = client.run_query(
+                build_profile_sql(source, columns, sample_percent, "COUNT(DISTINCT {})")
+            )
+        if err or not result:
+            return [], "", err or "Profile query returned no rows"
+        
+        values = result[0]
+        total = values[0] or 0
+        rows = []
+        for i, (name, data_type) in enumerate(columns):
+            count, low, high, distinct = values[1 + i * 4: 5 + i * 4]
+            nulls = total - (count or 0)
+            type_name = data_type if isinstance(data_type, str) else "/".join(sorted(_type_names(data_type))[:1])
+            rows.append((
+                name, type_name, count, nulls,
+                f"{100.0 * nulls / total:.1f}" if total else "",
+                low, high, distinct,
+            ))
+        note = f"{len(columns)} columns, {total:,} rows"
+        if sample_percent:
+            note += f" ({sample_percent}% sample)"
+        self.cache[key] = (rows, note)
+        return rows, note, None
+
+
+class QueryHistory:
+    """Persistent history of executed SQL in a local SQLite file.
+
+    Uses an FTS5 full-text index when the SQLite build has it, plain LIKE otherwise.
+    Searches are prefix matches on every typed word; when those find nothing the most
+    recent entries are ranked as fuzzy (in-order character) matches instead.
+    """
+    FUZZY_SCAN = 5000
+
+    def __init__(self, path=HISTORY_DB_PATH):
+        self.conn = sqlite3.connect(str(path))
+        # WAL without per-commit fsync keeps recording cheap during long scripts
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS history ("
+            "id INTEGER PRIMARY KEY, sql TEXT NOT NULL, executed_at TEXT NOT NULL, "
+            "library TEXT, elapsed REAL, row_count INTEGER, error TEXT)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS history_sql ON history(sql)")
+        try:
+            self.conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS history_fts "
+                "USING fts5(sql, content='history', content_rowid='id')"
+            )
+            self.conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS history_ai AFTER INSERT ON history BEGIN "
+                "INSERT INTO history_fts(rowid, sql) VALUES (new.id, new.sql); END"
+            )
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            self.has_fts = False
+        self.conn.commit()
+
+    def record(self, sql: str, library: str, elapsed: float, row_count=None, error=None):
+        self.conn.execute(
+            "INSERT INTO history (sql, executed_at, library, elapsed, row_count, error) VALUES (?, ?, ?, ?, ?, ?)",
+            (sql, datetime.now().isoformat(sep=" ", timespec="seconds"), library, elapsed, row_count, error)
+        )
+        self.conn.commit()
+
+    def record_many(self, library: str, entries):
+        """Record [(sql, executed_at, elapsed, row_count, error), ...] in one transaction"""
+        self.conn.executemany(
+            "INSERT INTO history (sql, executed_at, library, elapsed, row_count, error) VALUES (?, ?, ?, ?, ?, ?)",
+            [(sql, executed_at, library, elapsed, row_count, error)
+             for sql, executed_at, elapsed, row_count, error in entries]
+        )
+        self.conn.commit()
+
+    _COLUMNS = "h.id, h.sql, h.executed_at, h.library, h.elapsed, h.row_count, h.error"
+
+    def search(self, text: str, limit: int = HISTORY_RESULTS):
+        """Return matching entries, newest first, as (id, sql, executed_at, library, elapsed, row_count, error)"""
+        words = re.findall(r"[\w#@$]+", text)
+        if not words:
+            return self.conn.execute(
+                f"SELECT {self._COLUMNS} FROM history h ORDER BY h.id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        if self.has_fts:
+            match = " ".join(f'"{w}"*' for w in words)
+            rows = self.conn.execute(
+                f"SELECT {self._COLUMNS} FROM history_fts f JOIN history h ON h.id = f.rowid "
+                f"WHERE history_fts MATCH ? ORDER BY h.id DESC LIMIT ?", (match, limit)
+            ).fetchall()
+        else:
+            where = " AND ".join("h.sql LIKE ?" for _ in words)
+            rows = self.conn.execute(
+                f"SELECT {self._COLUMNS} FROM history h WHERE {where} ORDER BY h.id DESC LIMIT ?",
+                [f"%{w}%" for w in words] + [limit]
+            ).fetchall()
+        return rows or self._fuzzy(text, limit)
+
+    def _fuzzy(self, text: str, limit: int):
+        pattern = re.compile(".*?".join(re.escape(c) for c in text.strip()), re.IGNORECASE | re.DOTALL)
+        recent = self.conn.execute(
+            f"SELECT {self._COLUMNS} FROM history h ORDER BY h.id DESC LIMIT ?", (self.FUZZY_SCAN,)
+        ).fetchall()
+        scored = []
+        for row in recent:
+            match = pattern.search(row[1])
+            if match:
+                scored.append((match.end() - match.start(), -row[0], row))
+        return [row for *_, row in sorted(scored)[:limit]]
+
+    def previous_elapsed(self, entry_id: int, sql: str):
+        """Elapsed time of the run of the same SQL before entry_id, or None"""
+        row = self.conn.execute(
+            "SELECT elapsed FROM history WHERE sql = ? AND id < ? AND error IS NULL ORDER BY id DESC LIMIT 1",
+            (sql, entry_id)
+        ).fetchone()
+        return row[0] if row else None
+
+
+_TABLE_REF_RE = re.compile(
+    rf'(?:\bFROM|\bJOIN|\bUPDATE|\bINTO|,)\s+(?:({_SQL_NAME})[./])?({_SQL_NAME})(?:\s+(?:AS\s+)?({_SQL_NAME}))?',
+    re.IGNORECASE
+)
+_COMPLETION_WORD_RE = re.compile(r'(?:([A-Z0-9_#@$"]+)[./])?([A-Z0-9_#@$]*)$', re.IGNORECASE)
+_ALIAS_STOP_WORDS = _SQL_KEYWORDS | frozenset((
+    "ON", "WHERE", "JOIN", "INNER", "LEFT", "RIGHT", "FULL", "CROSS", "OUTER", "GROUP", "ORDER",
+    "HAVING", "FETCH", "LIMIT", "OFFSET", "UNION", "SET", "VALUES", "FROM", "SELECT", "USING", "WITH",
+))
+
+
+class SqlCompleter:
+    """Library/table/column completion from catalog data cached in memory.
+
+    Each library is loaded once (one SYSCOLUMNS query, normally on a worker) into
+    prefix indexes, so lookups while typing never touch the server.
+    """
+    def __init__(self):
+        self.libraries = NameIndex([], substring=False)
+        self.tables = {}      # lib -> NameIndex of table names
+        self.columns = {}     # (lib, table) -> NameIndex of column names
+
+    def set_libraries(self, names):
+        self.libraries = NameIndex(names, substring=False)
+
+    def add_library(self, lib: str, table_columns: dict):
+        lib = lib.upper()
+        self.tables[lib] = NameIndex(table_columns, substring=False)
+        for table, columns in table_columns.items():
+            self.columns[(lib, table)] = NameIndex(columns, substring=False)
+
+    def table_refs(self, statement: str, default_lib: str):
+        """Return {name or alias: (lib, table)} for tables referenced in statement"""
+        refs = {}
+        for lib, table, alias in _TABLE_REF_RE.findall(statement):
+            lib = _unquote(lib) if lib else default_lib.upper()
+            table = _unquote(table)
+            if (lib, table) not in self.columns:
+                continue
+            refs[table] = (lib, table)
+            if alias and alias.upper() not in _ALIAS_STOP_WORDS:
+                refs[_unquote(alias)] = (lib, table)
+        return refs
+
+    def complete(self, statement: str, before_cursor: str, default_lib: str, limit: int = COMPLETION_MAX_SUGGESTIONS):
+        """Return (prefix, suggestions) for the word ending at the cursor"""
+        match = _COMPLETION_WORD_RE.search(before_cursor)
+        qualifier, prefix = (match.group(1), match.group(2)) if match else (None, "")
+        if qualifier is None and not prefix:
+            return prefix, []
+        refs = self.table_refs(statement, default_lib)
+        if qualifier:
+            qualifier = _unquote(qualifier)
+            if qualifier in refs:
+                return prefix, self.columns[refs[qualifier]].starting_with(prefix, limit)
+            if qualifier in self.tables:
+                return prefix, self.tables[qualifier].starting_with(prefix, limit)
+            key = (default_lib.upper(), qualifier)
+            if key in self.columns:
+                return prefix, self.columns[key].starting_with(prefix, limit)
+            return prefix, []
+        
+        suggestions = []
+        for key in dict.fromkeys(refs.values()):
+            suggestions.extend(self.columns[key].starting_with(prefix, limit))
+        suggestions = list(dict.fromkeys(suggestions))[:limit]
+        if default_lib.upper() in self.tables:
+            suggestions.extend(self.tables[default_lib.upper()].starting_with(prefix, limit - len(suggestions)))
+        if len(suggestions) < limit:
+            suggestions.extend(self.libraries.starting_with(prefix, limit - len(suggestions)))
+        return prefix, list(dict.fromkeys(suggestions))[:limit]
+
+
+def build_sample_sql(lib: str, table: str, columns, estimate: int, rows: int,
+                     method: str = PREVIEW_SAMPLE_METHOD, deleted: int = 0):
+    """Build a random-sample preview query of about rows rows from lib.table.
+
+    RRN draws random relative record numbers over the whole physical range (live plus
+    deleted record slots) so only those records are read; TABLESAMPLE leaves block
+    sampling to the database. Both over-sample and end in ORDER BY RAND(), so the
+    FETCH FIRST added by pagination keeps a random page rather than the lowest RRNs.
+    When mostly-deleted files would need more than PREVIEW_MAX_RRNS record numbers,
+    RRN falls back to TABLESAMPLE.
+    Returns (sql, note) where note describes the method and sampled fraction.
+    """
+    projection = ", ".join(f"T.{_quote_ident(c)}" for c in columns) if columns else "T.*"
+    span = estimate + max(0, deleted)
+    # Draw enough record numbers that about rows * PREVIEW_OVERSAMPLE of them are live
+    wanted = min(span, max(1, math.ceil(rows * PREVIEW_OVERSAMPLE * span / estimate)))
+    method = method.upper()
+    fallback = ""
+    if method == "RRN" and wanted > PREVIEW_MAX_RRNS:
+        method = "TABLESAMPLE"
+        fallback = f", {max(0, deleted):,} deleted records - too many for RRN sampling"
+    if method == "TABLESAMPLE":
+        sql = f"SELECT {projection} FROM {lib}.{table} T TABLESAMPLE SYSTEM({100.0 * wanted / span:.6f})"
+    else:
+        rrns = sorted(random.sample(range(1, span + 1), wanted))
+        sql = f"SELECT {projection} FROM {lib}.{table} T WHERE RRN(T) IN ({', '.join(map(str, rrns))})"
+    sql += " ORDER BY RAND()"
+    percent = 100.0 * min(rows, estimate) / estimate
+    note = f"{method} sample ~{rows} of {estimate:,} rows ({percent:.4g}%){fallback}"
+    return sql, note
+
+
+def iter_sql_statements(script: str, index: int = 0, byte_offset: int = 0):
+    """Yield (index, statement, end_char, end_byte) for each non-empty ';'-separated
+    statement, numbering from index + 1. End offsets point just past the statement's
+    ';' (chars relative to script, bytes continuing from byte_offset in UTF-8)."""
+    pos = 0
+    while pos < len(script):
+        end = script.find(";", pos)
+        end = len(script) if end < 0 else end + 1
+        chunk = script[pos:end]
+        byte_offset += len(chunk.encode("utf-8"))
+        pos = end
+        stmt = chunk.rstrip(";").strip()
+        if stmt:
+            index += 1
+            yield index, stmt, pos, byte_offset
+
+
+class ScriptJournal:
+    """Checkpoints and run reports of SQL scripts, kept in a small JSON file.
+
+    Entries are keyed by the script's SHA-256 when it started and record the statement
+    index and char/byte offsets just past the last committed statement, plus the SHA-256
+    of the script bytes up to there (prefix_sha256). A failed run can resume there once
+    the rest of the script has been fixed, as long as the part that already ran is unchanged.
+    Only the most recent runs are kept, so the file (rewritten at every checkpoint) stays small.
+    """
+    MAX_REPORTS = 20
+    MAX_ENTRIES = 20   # Kept of each kind (completed, unfinished), most recently updated first
+
+    def __init__(self, path=SCRIPT_JOURNAL_PATH):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        try:
+            self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.entries = {}
+
+    @staticmethod
+    def script_key(script: str) -> str:
+        return hashlib.sha256(script.encode("utf-8")).hexdigest()
+
+    def _prune(self):
+        """Drop all but the MAX_ENTRIES most recently updated completed and unfinished runs"""
+        for completed in (True, False):
+            entries = sorted((e.get("updated", ""), k) for k, e in self.entries.items()
+                             if (e.get("status") == "completed") == completed)
+            for _, key in entries[:-self.MAX_ENTRIES]:
+                del self.entries[key]
+
+    def _save(self):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self.entries, indent=1), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def checkpoint(self, key: str, **fields):
+        with self.lock:
+            entry = self.entries.setdefault(key, {"reports": []})
+            entry.update(fields, updated=datetime.now().isoformat(sep=" ", timespec="microseconds"))
+            self._prune()
+            self._save()
+
+    def add_report(self, key: str, report: dict):
+        with self.lock:
+            reports = self.entries.setdefault(key, {"reports": []}).setdefault("reports", [])
+            reports.append(report)
+            del reports[:-self.MAX_REPORTS]
+            self._save()
+
+    def latest_incomplete(self):
+        """Return (key, entry) of the most recently updated failed/interrupted run, or (None, None)"""
+        with self.lock:
+            pending = [(e.get("updated", ""), k) for k, e in self.entries.items() if e.get("status") != "completed"]
+            if not pending:
+                return None, None
+            key = max(pending)[1]
+            return key, dict(self.entries[key])
+
+
+class ConnectionPool:
+    """Up to size extra DB2Client connections, opened on first use and reused"""
+    def __init__(self, client: DB2Client, size: int = CONNECTION_POOL_SIZE):
+        self.client = client
+        self.size = size
+        self.idle = queue.Queue()
+        self.created = 0
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        with self.lock:
+            create = self.idle.empty() and self.created < self.size
+            if create:
+                self.created += 1
+        if create:
+            try:
+                conn = self.client.clone()
+            except Exception:
+                with self.lock:
+                    self.created -= 1
+                raise
+        else:
+            conn = self.idle.get()
+        try:
+            yield conn
+        finally:
+            self.idle.put(conn)
+
+
+class TableComparer:
+    """Compares two copies of a table by key-range chunk checksums.
+
+    Key ranges come from NTILE over the left table's keys, plus one range for rows
+    whose key is NULL. For every range both
+    tables report COUNT(*) and the sum of a per-row hash, computed server-side and
+    in parallel over pooled connections; only ranges whose (count, sum) differ are
+    drilled into, and then only keys and row hashes are fetched.
+    """
+    HEADERS = ["CHUNK", "KEY", "DIFFERENCE"]
+
+    def __init__(self, client: DB2Client, pool: ConnectionPool):
+        self.client = client
+        self.pool = pool
+
+    def _query(self, sql, params=()):
+        with self.pool.connection() as conn:
+            headers, rows, err = conn.run_query(sql, params)
+        if err:
+            raise RuntimeError(err)
+        return rows
+
+    def _key_ranges(self, lib, table, key, chunks):
+        """Return [(predicate, params)] covering every non-null key, in key order"""
+        rows = self._query(
+            f"SELECT MIN(K) FROM (SELECT {key} AS K, NTILE({chunks}) OVER (ORDER BY {key}) AS TILE "
+            f"FROM {lib}.{table} WHERE {key} IS NOT NULL) X GROUP BY TILE ORDER BY 1"
+        )
+        bounds = [r[0] for r in rows]
+        if len(bounds) <= 1:
+            return [(f"{key} IS NOT NULL", ())]
+        ranges = [(f"{key} < ?", (bounds[1],))]
+        for low, high in zip(bounds[1:], bounds[2:]):
+            ranges.append((f"{key} >= ? AND {key} < ?", (low, high)))
+        ranges.append((f"{key} >= ?", (bounds[-1],)))
+        return ranges
+
+    def _source(self, lib, table, columns, predicate):
+        return f"(SELECT {columns} FROM {lib}.{table} WHERE {predicate}) R"
+
+    def _checksum(self, lib, table, columns, predicate, params):
+        rows = self._query(
+            f"SELECT COUNT(*), SUM(CAST({COMPARE_ROW_HASH_SQL} AS DECIMAL(31, 0))) "
+            f"FROM {self._source(lib, table, columns, predicate)}", params
+        )
+        return tuple(rows[0]) if rows else (0, None)
+
+    def _row_hashes(self, lib, table, columns, key, predicate, params):
+        """Return {key: sorted row hashes}; a key that is not unique maps to several hashes"""
+        rows = self._query(
+            f"SELECT R.{key}, {COMPARE_ROW_HASH_SQL} FROM {self._source(lib, table, columns, predicate)} "
+            f"ORDER BY 1, 2", params
+        )
+        hashes = {}
+        for k, row_hash in rows:
+            hashes.setdefault(k, []).append(row_hash)
+        return hashes
+
+    def compare(self, left, right, key_column: str = "", progress=None):
+        """Compare (lib, table) pairs left and right.
+
+        Returns (rows, note, error) where rows follow HEADERS; progress, if given, is
+        called with status messages as the comparison advances.
+        """
+        progress = progress or (lambda message: None)
+        try:
+            left_columns = self.client.get_columns(*left)
+            right_names = {name for name, _ in self.client.get_columns(*right)}
+            common = [name for name, data_type in left_columns
+                      if name in right_names and not _type_names(data_type) & _LOB_TYPE_NAMES]
+            if not common:
+                return [], "", "The tables have no comparable columns in common"
+            key_column = key_column.upper() or next(iter(self.client.get_key_columns(*left)), "")
+            if not key_column or key_column not in common:
+                return [], "", "A key column present in both tables is required"
+            key = _quote_ident(key_column)
+            columns = ", ".join(_quote_ident(c) for c in common)
+            
+            # NTILE ranges only cover non-null keys; NULL-key rows get a range of their own
+            ranges = self._key_ranges(*left, key, COMPARE_CHUNKS) + [(f"{key} IS NULL", ())]
+            progress(f"Comparing {len(ranges)} key ranges over {len(common)} columns...")
+            with ThreadPoolExecutor(max_workers=self.pool.size) as executor:
+                futures = [
+                    (executor.submit(self._checksum, *left, columns, predicate, params),
+                     executor.submit(self._checksum, *right, columns, predicate, params))
+                    for predicate, params in ranges
+                ]
+                sums = [(l.result(), r.result()) for l, r in futures]
+            mismatched = [i for i, (l, r) in enumerate(sums) if l != r]
+            progress(f"{len(mismatched)} of {len(ranges)} ranges differ; fetching row hashes for those")
+            
+            rows = []
+            left_name, right_name = f"{left[0]}.{left[1]}", f"{right[0]}.{right[1]}"
+            pending = iter(mismatched)
+            with ThreadPoolExecutor(max_workers=self.pool.size) as executor:
+                def submit(i):
+                    return (i, executor.submit(self._row_hashes, *left, columns, key, *ranges[i]),
+                            executor.submit(self._row_hashes, *right, columns, key, *ranges[i]))
+                # Chunks are drilled into in order, with only enough in flight to keep the
+                # pool busy, so reaching COMPARE_MAX_DIFFERENCES leaves the rest unfetched
+                in_flight = deque(submit(i) for i in islice(pending, max(1, self.pool.size // 2)))
+                while in_flight and len(rows) < COMPARE_MAX_DIFFERENCES:
+                    chunk, left_future, right_future = in_flight.popleft()
+                    following = next(pending, None)
+                    if following is not None:
+                        in_flight.append(submit(following))
+                    left_rows, right_rows = left_future.result(), right_future.result()
+                    for k in sorted(left_rows.keys() | right_rows.keys(), key=str):
+                        left_hashes, right_hashes = left_rows.get(k, []), right_rows.get(k, [])
+                        if not right_hashes:
+                            rows.append((chunk + 1, k, f"only in {left_name}"))
+                        elif not left_hashes:
+                            rows.append((chunk + 1, k, f"only in {right_name}"))
+                        elif len(left_hashes) != len(right_hashes):
+                            rows.append((chunk + 1, k, f"{len(left_hashes)} vs {len(right_hashes)} rows"))
+                        elif left_hashes != right_hashes:
+                            rows.append((chunk + 1, k, "values differ"))
+                for _, left_future, right_future in in_flight:
+                    left_future.cancel()
+                    right_future.cancel()
+            left_total = sum(l[0] or 0 for l, _ in sums)
+            right_total = sum(r[0] or 0 for _, r in sums)
+            note = (f"{left_total:,} vs {right_total:,} rows, {len(mismatched)}/{len(ranges)} ranges differ, "
+                    f"{len(rows)} differing row(s)")
+            left_nulls, right_nulls = (sums[-1][0][0] or 0), (sums[-1][1][0] or 0)
+            if left_nulls or right_nulls:
+                note += f", NULL keys: {left_nulls:,} vs {right_nulls:,} rows"
+            if len(rows) >= COMPARE_MAX_DIFFERENCES:
+                note += f" (first {COMPARE_MAX_DIFFERENCES} shown)"
+            return rows[:COMPARE_MAX_DIFFERENCES], note, None
+        except Exception as e:
+            return [], "", str(e)
+
+
+class ResultGrid(DataTable):
+    """Results DataTable whose rows are PageRow views onto ResultPage columns"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.page_columns = {}
+    
+    def load_page(self, page: ResultPage, keys):
+        """Replace the grid contents with page, its rows keyed by keys; returns the column keys"""
+        self.clear(columns=True)
+        column_keys = self.add_columns(*page.headers)
+        self.page_columns = dict(zip(column_keys, range(len(column_keys))))
+        for index, key in enumerate(keys):
+            self.add_page_row(page, index, key)
+        return column_keys
+    
+    def add_page_row(self, page: ResultPage, index: int, key: str):
+        row_key = self.add_row(key=key)
+        self._data[row_key] = PageRow(page, index, self.page_columns)
+        return row_key
+    
+    def rebind_rows(self, page: ResultPage, rows):
+        """Point existing rows at page: rows is [(key, index in page)]. Clears overrides."""
+        for key, index in rows:
+            view = self._data[key]
+            view.page, view.index, view.overrides = page, index, None
+        self._update_count += 1
+        self.refresh()
+
+
 class TableItem(ListItem):
     def __init__(self, name: str, row_count: int = None):
+        self.label = Label("")
+        super().__init__(self.label)
+        self.set_table(name, row_count)
+    
+    def set_table(self, name: str, row_count: int = None):
+        """Re-point this (pooled) item at another table"""
         self.table_name = name
         self.row_count = row_count
-        display = f"{name} ({row_count} rows)" if row_count is not None else name
-        super().__init__(Label(display))
+        self.label.update(f"{name} ({row_count} rows)" if row_count is not None else name)
+
+
+class MoreItem(ListItem):
+    """Placeholder before (step -1) or after (step 1) the window of tables shown in the
+    sidebar; selecting or highlighting it moves the window"""
+    def __init__(self, step: int):
+        self.step = step
+        self.remaining = 0
+        self.label = Label("")
+        super().__init__(self.label)
+    
+    def set_remaining(self, remaining: int):
+        self.remaining = remaining
+        where = "earlier" if self.step < 0 else "more"
+        self.set_message(f"... {remaining} {where} (select, or type to filter)" if remaining else "", bool(remaining))
+    
+    def set_message(self, message: str, enabled: bool = False):
+        self.label.update(message)
+        self.display = bool(message)
+        self.disabled = not enabled
 
 
 class StatusBar(Static):
@@ -206,12 +1324,12 @@ class StatusBar(Static):
         self.update(f"[{icon}] [{timestamp}] {message}")
 
 
-class MessagePanel(Static):
-    """Message output panel for logs and errors"""
+class MessagePanel(Log):
+    """Message output panel for logs and errors (appends lines, keeps the last LOG_MAX_LINES)"""
     def __init__(self):
-        super().__init__("")
-        self.messages = []
-        self.max_messages = 100
+        super().__init__(max_lines=LOG_MAX_LINES)
+        self.max_messages = LOG_MAX_LINES
+        self.messages = deque(maxlen=self.max_messages)
     
     def add_message(self, message: str, msg_type: str = "info"):
         timestamp = datetime.now().strftime("%H:%M:%S")
@@ -226,16 +1344,11 @@ class MessagePanel(Static):
         
         formatted_msg = f"[{timestamp}] {icon} {message}"
         self.messages.append(formatted_msg)
-        
-        if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages:]
-        
-        display_messages = self.messages[-5:]
-        self.update("\n".join(display_messages))
+        self.write_line(formatted_msg)
     
     def clear_messages(self):
-        self.messages = []
-        self.update("")
+        self.messages.clear()
+        self.clear()
 
 
 class PaginationBar(Static):
@@ -313,6 +1426,172 @@ class LoadFileScreen(ModalScreen):
             self.dismiss(file_path)
 
 
+class PerformanceScreen(ModalScreen):
+    """Index advice and access estimate for the current query; dismisses with "refresh"
+    when the user asks to re-read the catalog"""
+    
+    def __init__(self, report: dict):
+        super().__init__()
+        self.report = report
+    
+    def compose(self) -> ComposeResult:
+        r = self.report
+        with Center():
+            with Vertical(id="perf-dialog"):
+                yield Label(f"Performance: {r['lib']}.{r['table']}  ([r] refresh from catalog)", id="perf-title")
+                with VerticalScroll(id="perf-content"):
+                    yield Static(self._render_report())
+                with Center():
+                    yield Button("Refresh", id="perf-refresh", variant="primary")
+                    yield Button("Close", id="perf-button", variant="success")
+    
+    def _render_report(self) -> Text:
+        r = self.report
+        fmt_rows = lambda n: "unknown" if n is None else f"{n:,}"
+        text = Text()
+        text.append("Estimated rows in table: ", style="bold")
+        text.append(f"{fmt_rows(r['rows'])}\n")
+        text.append("Access estimate: ", style="bold")
+        if r["full_scan"]:
+            text.append(f"table scan, ~{fmt_rows(r['rows'])} rows read\n", style=COLOR_TEXT_SELECTED)
+        else:
+            text.append("index probe available for at least one predicate\n")
+        
+        text.append("\nPredicates\n", style="bold underline")
+        if not r["predicates"]:
+            text.append("  (no WHERE predicates)\n")
+        for column, op, support, scanned in r["predicates"]:
+            line = f"  {column} {op}: {support}"
+            if scanned is not None:
+                line += f" (~{fmt_rows(scanned)} rows scanned)"
+            text.append(line + "\n", style=None if support == "index" else COLOR_TEXT_SELECTED)
+        
+        text.append("\nExisting indexes\n", style="bold underline")
+        if not r["indexes"]:
+            text.append("  (none)\n")
+        for name, columns in r["indexes"].items():
+            text.append(f"  {name}: {', '.join(columns)}\n")
+        
+        text.append("\nIndex advice (QSYS2.SYSIXADV)\n", style="bold underline")
+        if not r["advice"]:
+            text.append("  (none recorded)\n")
+        for columns, index_type, times, last, reason, avg_estimate in r["advice"]:
+            text.append(f"  {str(columns).strip()} [{str(index_type).strip()}] advised {times}x, last {last}")
+            if reason:
+                text.append(f", reason {str(reason).strip()}")
+            if avg_estimate is not None:
+                text.append(f", avg query estimate {avg_estimate}s")
+            text.append("\n")
+        return text
+    
+    def on_button_pressed(self, event: Button.Pressed) -> None:
+        self.dismiss("refresh" if event.button.id == "perf-refresh" else None)
+    
+    def on_key(self, event) -> None:
+        if event.key == "escape":
+            self.dismiss(None)
+        elif event.key == "r":
+            self.dismiss("refresh")
+
+
+class CompareScreen(ModalScreen):
+    """Table comparison dialog; dismisses with (left, right, key column)"""
+    
+    def __init__(self, left: str = ""):
+        super().__init__()
+        self.left = left
+    
+    def compose(self) -> ComposeResult:
+        with Center():
+            with Vertical(id="compare-dialog"):
+                yield Label("Compare Tables", id="compare-title")
+                yield Input(value=self.left, placeholder="Left table (LIB.TABLE)", id="compare-left")
+                yield Input(placeholder="Right table (LIB.TABLE)", id="compare-right")
+                yield Input(placeholder="Key column (default: primary key)", id="compare-key")
+                with Center():
+                    yield Button("Compare", id="compare-button", variant="primary")
+                    yield Button("Cancel", id="compare-cancel", variant="error")
+    
+    def on_mount(self) -> None:
+        self.query_one("#compare-right" if self.left else "#compare-left").focus()
+    
+    def _submit(self) -> None:
+        left = self.query_one("#compare-left", Input).value.strip()
+        right = self.query_one("#compare-right", Input).value.strip()
+        if left and right:
+            self.dismiss((left, right, self.query_one("#compare-key", Input).value.strip()))
+    
+    def on_button_pressed(self, event: Button.Pressed) -> None:
+        if event.button.id == "compare-button":
+            self._submit()
+        else:
+            self.dismiss(None)
+    
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        self._submit()
+    
+    def on_key(self, event) -> None:
+        if event.key == "escape":
+            self.dismiss(None)
+
+
+class HistoryScreen(ModalScreen):
+    """Query history search; dismisses with the chosen SQL"""
+    
+    def __init__(self, history: QueryHistory):
+        super().__init__()
+        self.history = history
+        self.entries = []
+    
+    def compose(self) -> ComposeResult:
+        with Center():
+            with Vertical(id="history-dialog"):
+                yield Label("Query History (Enter to recall, Esc to close)", id="history-title")
+                yield Input(placeholder="Search history...", id="history-search")
+                yield DataTable(id="history-results", cursor_type="row")
+    
+    def on_mount(self) -> None:
+        dt = self.query_one("#history-results", DataTable)
+        dt.add_columns("WHEN", "LIB", "SECS", "VS PREV", "ROWS", "SQL")
+        self.refresh_results("")
+        self.query_one("#history-search").focus()
+    
+    def refresh_results(self, text: str):
+        self.entries = self.history.search(text)
+        dt = self.query_one("#history-results", DataTable)
+        dt.clear()
+        for entry_id, sql, executed_at, library, elapsed, row_count, error in self.entries:
+            previous = self.history.previous_elapsed(entry_id, sql) if elapsed is not None else None
+            trend = f"{elapsed - previous:+.2f}" if previous is not None else ""
+            dt.add_row(
+                executed_at, library or "",
+                f"{elapsed:.2f}" if elapsed is not None else "",
+                Text(trend, style=COLOR_TEXT_SELECTED if previous is not None and elapsed > previous * 1.5 else ""),
+                "ERR" if error else ("" if row_count is None else str(row_count)),
+                Text(" ".join(sql.split())[:200], no_wrap=True),
+                key=str(entry_id),
+            )
+    
+    @on(Input.Changed, "#history-search")
+    def on_search(self, event: Input.Changed) -> None:
+        self.refresh_results(event.value)
+    
+    @on(Input.Submitted, "#history-search")
+    def on_search_submitted(self, event: Input.Submitted) -> None:
+        if self.entries:
+            self.dismiss(self.entries[0][1])
+    
+    @on(DataTable.RowSelected, "#history-results")
+    def on_row_selected(self, event: DataTable.RowSelected) -> None:
+        self.dismiss(self.entries[event.cursor_row][1])
+    
+    def on_key(self, event) -> None:
+        if event.key == "escape":
+            self.dismiss(None)
+        elif event.key == "down" and self.query_one("#history-search").has_focus:
+            self.query_one("#history-results").focus()
+
+
 class SqlApp(App):
     TITLE = "DB2 TUI Client - Enhanced Edition"
     
@@ -366,6 +1645,12 @@ class SqlApp(App):
         border: solid {COLOR_BORDER_FOCUS};
     }}
     
+    #completions {{
+        height: 1;
+        color: {COLOR_TEXT_SELECTED};
+        padding: 0 1;
+    }}
+    
     #sql-hint {{
         background: {COLOR_PAGINATION_BG};
         color: {COLOR_TEXT_SELECTED};
@@ -385,6 +1670,10 @@ class SqlApp(App):
         border: solid {COLOR_BORDER_FOCUS};
     }}
     
+    #table-filter {{
+        margin: 0;
+    }}
+    
     ListView {{
         background: {COLOR_SIDEBAR_BG};
         color: {COLOR_LISTVIEW_TEXT};
@@ -516,6 +1805,55 @@ class SqlApp(App):
         align: center middle;
     }}
     
+    PerformanceScreen, HistoryScreen {{
+        align: center middle;
+    }}
+    
+    #history-dialog {{
+        width: 90%;
+        height: 80%;
+        background: {COLOR_HEADER_BG};
+        border: thick {COLOR_BORDER};
+        padding: 1 2;
+    }}
+    
+    #history-title {{
+        text-style: bold;
+        color: {COLOR_TEXT_SELECTED};
+        width: 100%;
+        text-align: center;
+    }}
+    
+    #history-search {{
+        width: 100%;
+        margin: 1 0;
+    }}
+    
+    #perf-dialog {{
+        width: 90;
+        height: 30;
+        background: {COLOR_HEADER_BG};
+        border: thick {COLOR_BORDER};
+        padding: 1 2;
+    }}
+    
+    #perf-title {{
+        text-style: bold;
+        color: {COLOR_TEXT_SELECTED};
+        text-align: center;
+        padding: 0 0 1 0;
+    }}
+    
+    #perf-content {{
+        height: 1fr;
+        color: {COLOR_HEADER_TEXT};
+    }}
+    
+    #perf-button, #perf-refresh {{
+        width: 20;
+        margin: 1 1 0 1;
+    }}
+    
     #file-dialog {{
         width: 70;
         height: 12;
@@ -539,6 +1877,34 @@ class SqlApp(App):
     #load-button, #cancel-button {{
         margin: 0 1;
     }}
+    
+    CompareScreen {{
+        align: center middle;
+    }}
+    
+    #compare-dialog {{
+        width: 70;
+        height: 22;
+        background: {COLOR_HEADER_BG};
+        border: thick {COLOR_BORDER};
+        padding: 1 2;
+    }}
+    
+    #compare-title {{
+        text-style: bold;
+        color: {COLOR_TEXT_SELECTED};
+        width: 100%;
+        text-align: center;
+    }}
+    
+    #compare-left, #compare-right, #compare-key {{
+        width: 100%;
+        margin: 1 0 0 0;
+    }}
+    
+    #compare-button, #compare-cancel {{
+        margin: 1 1 0 1;
+    }}
     """
     
     BINDINGS = [
@@ -548,7 +1914,15 @@ class SqlApp(App):
         Binding("l", "last_page", "Last Page", show=True),
         Binding("s", "change_page_size", "Change Page Size", show=True),
         Binding("r", "refresh", "Refresh", show=True),
+        Binding("w", "toggle_watch", "Watch", show=True),
+        Binding("i", "show_performance", "Indexes", show=True),
+        Binding("t", "profile", "Profile", show=True),
+        Binding("m", "toggle_sample_preview", "Sample", show=True),
+        Binding("d", "compare_tables", "Compare", show=True),
         Binding("ctrl+o", "load_file", "Open SQL", show=True),
+        Binding("ctrl+r", "show_history", "History", show=True, priority=True),
+        Binding("ctrl+g", "resume_script", "Resume Script", show=True, priority=True),
+        Binding("ctrl+n", "complete", "Complete", show=False, priority=True),
         Binding("ctrl+e", "execute_sql", "Execute", show=True, priority=True),
         Binding("c", "clear_table", "Clear", show=False),
         Binding("ctrl+a", "show_about", "About", show=True),
@@ -557,7 +1931,26 @@ class SqlApp(App):
 
     def __init__(self):
         super().__init__()
-        self.client = DB2Client()
+        if AGENT_ADDRESS:
+            self.client = DB2Client(remote_connection_factory(AGENT_ADDRESS, AGENT_TOKEN))
+        else:
+            self.client = DB2Client()
+        self.index_advisor = IndexAdvisor(self.client)
+        self.profiler = ColumnProfiler(self.client)
+        self.completer = SqlCompleter()
+        self.completions = []
+        # Background connections by purpose, cloned from self.client on first use
+        self.background_clients = {}
+        self.clone_lock = threading.Lock()
+        self.sample_preview = False
+        self.sample_note = ""
+        self.loaded_file_path = None
+        self.script_journal = ScriptJournal()
+        self.comparer = TableComparer(self.client, ConnectionPool(self.client))
+        try:
+            self.history = QueryHistory()
+        except sqlite3.Error:
+            self.history = None
         self.current_lib = ""
         self.current_table = ""
         self.current_sql = ""
@@ -566,6 +1959,15 @@ class SqlApp(App):
         self.total_rows = 0
         self.loaded_sql = ""
         self.loaded_file_name = ""
+        self.current_page_data = None
+        self.table_index = NameIndex([])
+        self.table_matches = []
+        self.table_window_start = 0
+        self.current_row_keys = []
+        self.current_column_keys = []
+        self.current_key_columns = []
+        self.watch_timer = None
+        self.watch_busy = False
 
     def compose(self) -> ComposeResult:
         yield Header(show_clock=True)
@@ -576,13 +1978,15 @@ class SqlApp(App):
         with Container(id="main"):
             with Vertical(id="sidebar"):
                 yield Label("TABLES", classes="header-text")
+                yield Input(placeholder="Filter tables...", id="table-filter")
                 yield ListView(id="list")
             
             with Vertical(id="right-panel"):
                 with Container(id="query-panel"):
                     yield Label("Press Ctrl+E to Execute SQL | Ctrl+O to Load File", id="sql-hint")
                     yield TextArea(id="sql", language="sql")
-                yield DataTable(id="results-table", cursor_type="row")
+                    yield Static("", id="completions")
+                yield ResultGrid(id="results-table", cursor_type="row")
                 yield PaginationBar()
         
         yield MessagePanel()
@@ -600,6 +2004,8 @@ class SqlApp(App):
         dt.cursor_type = "row"
         
         self.query_one("#lib").focus()
+        if status:
+            self._load_libraries()
 
     def on_key(self, event) -> None:
         """Log key presses only when debug mode is enabled"""
@@ -621,24 +2027,95 @@ class SqlApp(App):
         self.query_one(StatusBar).update_status(f"Loading tables from {self.current_lib}...", "query")
         tables = self.client.get_tables(self.current_lib)
         
-        lv = self.query_one("#list")
-        lv.clear()
+        self.table_index = NameIndex(tables)
+        self.profiler.cache.clear()
+        if tables and self.current_lib not in self.completer.tables:
+            self._load_catalog(self.current_lib)
+        self.query_one("#table-filter", Input).value = ""
         
         if not tables:
-            lv.append(ListItem(Label(f"No tables in {self.current_lib}")))
+            self.filter_tables("")
+            self.query_one("#list").children[0].set_message(f"No tables in {self.current_lib}")
             self.add_message(f"No tables found in library {self.current_lib}", "warning")
             self.query_one(StatusBar).update_status(f"No tables found in {self.current_lib}", "error")
         else:
-            for t in tables:
-                lv.append(TableItem(t))
+            self.filter_tables("")
             
             self.add_message(f"Loaded {len(tables)} tables from {self.current_lib}", "success")
             self.query_one(StatusBar).update_status(f"Loaded {len(tables)} tables from {self.current_lib}", "success")
             self.query_one("#list").focus()
 
+    def filter_tables(self, text: str):
+        """Show the tables matching text in the sidebar window"""
+        self.table_matches = self.table_index.search(text)
+        self.show_table_window(0)
+        lv = self.query_one("#list", ListView)
+        lv.index = 1 if self.table_matches else None
+
+    def _table_pool(self):
+        """The sidebar's fixed widgets: placeholder, SIDEBAR_MAX_ITEMS table items, placeholder.
+
+        Created on first use and then only relabelled, shown or hidden, so a library
+        of any size never materializes more than SIDEBAR_MAX_ITEMS + 2 list items.
+        """
+        lv = self.query_one("#list", ListView)
+        if len(lv.children) != SIDEBAR_MAX_ITEMS + 2:
+            lv.clear()
+            lv.extend([MoreItem(-1)] + [TableItem("") for _ in range(SIDEBAR_MAX_ITEMS)] + [MoreItem(1)])
+        return lv.children
+
+    def show_table_window(self, start: int):
+        """Point the pooled sidebar items at table_matches[start:start + SIDEBAR_MAX_ITEMS]"""
+        items = self._table_pool()
+        total = len(self.table_matches)
+        start = max(0, min(start, total - SIDEBAR_MAX_ITEMS))
+        end = min(start + SIDEBAR_MAX_ITEMS, total)
+        names = self.table_index.names
+        for item, match in zip(items[1:-1], range(start, start + SIDEBAR_MAX_ITEMS)):
+            if match < end:
+                item.set_table(names[self.table_matches[match]])
+            # Hidden rather than disabled: toggling disabled restyles every item
+            item.display = match < end
+        items[0].set_remaining(start)
+        items[-1].set_remaining(total - end)
+        self.table_window_start = start
+
+    def move_table_window(self, step: int):
+        """Slide the sidebar window half its size towards step, keeping the table next to
+        the placeholder highlighted"""
+        lv = self.query_one("#list", ListView)
+        start = self.table_window_start
+        target = start + SIDEBAR_MAX_ITEMS if step > 0 else start - 1
+        self.show_table_window(start + step * (SIDEBAR_MAX_ITEMS // 2))
+        lv.index = 1 + target - self.table_window_start
+
+    @on(Input.Changed, "#table-filter")
+    def on_table_filter(self, event):
+        if len(self.table_index):
+            self.filter_tables(event.value)
+            self.query_one(StatusBar).update_status(
+                f"{len(self.table_matches)} of {len(self.table_index)} tables match '{event.value}'", "info"
+            )
+
+    @on(Input.Submitted, "#table-filter")
+    def on_table_filter_submitted(self, event):
+        self.query_one("#list").focus()
+
+    @on(ListView.Highlighted, "#list")
+    def on_table_highlighted(self, event):
+        # Scrolling onto a placeholder with the keyboard pages the window along
+        if isinstance(event.item, MoreItem) and event.item.remaining:
+            self.move_table_window(event.item.step)
+        elif event.item is not None and not event.item.display:
+            # Moved past the last match onto a hidden pool item: stay on the last match
+            shown = min(SIDEBAR_MAX_ITEMS, len(self.table_matches) - self.table_window_start)
+            self.query_one("#list", ListView).index = shown or None
+
     @on(ListView.Selected, "#list")
     def on_select(self, event):
-        if isinstance(event.item, TableItem):
+        if isinstance(event.item, MoreItem):
+            self.move_table_window(event.item.step)
+        elif isinstance(event.item, TableItem):
             self.current_table = event.item.table_name
             sql = f"SELECT * FROM {self.current_lib}.{self.current_table}"
             
@@ -647,13 +2124,45 @@ class SqlApp(App):
             
             self.query_one("#sql", TextArea).text = sql
             self.add_message(f"Loading table: {self.current_table}", "query")
+            self.current_key_columns = self.client.get_key_columns(self.current_lib, self.current_table)
+            self.sample_note = ""
+            if self.sample_preview:
+                sql = self._sample_preview_sql(sql)
             self.current_sql = sql
             self.current_offset = 0
-            self.execute_query()
+            if self.execute_query() and self.sample_note:
+                self.add_message(f"Preview: {self.sample_note}", "info")
+                self.query_one(StatusBar).update_status(f"Preview: {self.sample_note}", "success")
+
+    def _sample_preview_sql(self, sql: str) -> str:
+        """Return a sampling query for the selected table, or sql if sampling would not help"""
+        estimate, deleted = self.client.get_row_stats(self.current_lib, self.current_table)
+        if not estimate or estimate <= self.page_size:
+            return sql
+        columns = []
+        table_columns = self.client.get_columns(self.current_lib, self.current_table)
+        if len(table_columns) > PREVIEW_MAX_COLUMNS:
+            columns = [name for name, _ in table_columns[:PREVIEW_MAX_COLUMNS]]
+        sample_sql, self.sample_note = build_sample_sql(
+            self.current_lib, self.current_table, columns, estimate, self.page_size, deleted=deleted
+        )
+        if columns:
+            self.sample_note += f", first {len(columns)} of {len(table_columns)} columns"
+        return sample_sql
+
+    def action_toggle_sample_preview(self):
+        """Toggle random-sample previews when selecting a table"""
+        self.sample_preview = not self.sample_preview
+        state = f"on ({PREVIEW_SAMPLE_METHOD})" if self.sample_preview else "off"
+        self.add_message(f"Sampled table preview {state}", "info")
+        self.query_one(StatusBar).update_status(f"Sampled table preview {state}", "info")
 
     def action_execute_sql(self):
         """Execute SQL from TextArea or loaded file (Ctrl+E)"""
         self.add_message("[Ctrl+E] Execution triggered", "info")
+        if self._script_running():
+            self.add_message("A script is still running - wait for it to finish", "warning")
+            return
         
         if self.loaded_sql:
             sql = self.loaded_sql
@@ -671,10 +2180,12 @@ class SqlApp(App):
         
         # Check if multi-statement
         if ';' in sql :
-            self._execute_multiple_statements(sql)
+            self._execute_multiple_statements(sql, self.loaded_file_path if self.loaded_sql else None)
         else:
             # Single statement
             self.current_sql = sql
+            self.current_key_columns = []
+            self.sample_note = ""
             self.current_offset = 0
             self.execute_query()
             
@@ -693,88 +2204,329 @@ class SqlApp(App):
         first_word = sql.strip().split()[0].upper()
         return first_word == 'SELECT' and sql.count(';') <= 1
 
-    def _execute_multiple_statements(self, sql_script: str) -> None:
-        """Execute every statement in order; commit DDL/DML on the fly."""
-        statements = self.client._split_sql_statements(sql_script)
-        total = len(statements)
+    def _script_running(self) -> bool:
+        """True while a script worker is still executing statements"""
+        return any(worker.group == "script" and worker.is_running for worker in self.workers)
 
-        for idx, stmt in enumerate(statements, 1):
+    def _execute_multiple_statements(self, sql_script: str, source_path=None, key=None, start=(0, 0, 0),
+                                     prefix_hash=None) -> None:
+        """Execute every statement in order on a worker, committing at each checkpoint.
+
+        sql_script is the whole script, or only its unexecuted remainder when resuming
+        from start = (statement index, char offset, byte offset) of journal entry key;
+        prefix_hash is then a hashlib.sha256 of the script bytes before that byte offset.
+        """
+        if key is None:
+            key = ScriptJournal.script_key(sql_script)
+        if prefix_hash is None:
+            prefix_hash = hashlib.sha256()
+        self.script_journal.checkpoint(
+            key, status="running", statement_index=start[0], char_offset=start[1], byte_offset=start[2],
+            prefix_sha256=prefix_hash.hexdigest(), path=str(source_path) if source_path is not None else None
+        )
+        self._run_script(sql_script, key, start, prefix_hash)
+
+    @work(thread=True, exclusive=True, group="script")
+    def _run_script(self, sql_script: str, key: str, start, prefix_hash) -> None:
+        worker = get_current_worker()
+        start_index, start_char, start_byte = start
+        total = start_index + sum(1 for chunk in sql_script.split(";") if chunk.strip())
+        done = committed = start
+        hashed = 0  # chars of sql_script already fed to prefix_hash
+        since_checkpoint = executed = 0
+        failure = None
+        began = last_progress = time.perf_counter()
+        # Log lines, history rows and the last SELECT result go to the UI in batches
+        messages, history, last_result = [], [], None
+
+        def progress():
+            nonlocal messages, history, last_result, last_progress
+            page = ResultPage(*last_result) if last_result is not None else None
+            self.call_from_thread(self._script_progress, messages, history, page)
+            messages, history, last_result = [], [], None
+            last_progress = time.perf_counter()
+
+        def checkpoint(**fields):
+            """Commit and move the checkpoint to done; returns the commit error, if any.
+
+            Statements are only committed here, so the checkpoint always marks the first
+            uncommitted statement. A failed commit leaves the previous checkpoint in place.
+            """
+            nonlocal hashed, committed
+            ok, msg = self.client.commit()
+            if not ok:
+                return msg
+            committed = done
+            prefix_hash.update(sql_script[hashed:done[1] - start_char].encode("utf-8"))
+            hashed = done[1] - start_char
+            self.script_journal.checkpoint(
+                key, statement_index=done[0], char_offset=done[1], byte_offset=done[2],
+                prefix_sha256=prefix_hash.hexdigest(), **fields
+            )
+            return None
+
+        commit_error = None
+        for idx, stmt, end_char, end_byte in iter_sql_statements(sql_script, start_index, start_byte):
+            if worker.is_cancelled:
+                break
             # skip pure comment lines
             if stmt.startswith("--"):
+                done = (idx, start_char + end_char, end_byte)
                 continue
 
-            self.add_message(f"[{idx}/{total}]  {stmt[:70]}{'...' if len(stmt) > 70 else ''}", "query")
+            messages.append((f"[{idx}/{total}]  {stmt[:70]}{'...' if len(stmt) > 70 else ''}", "query"))
 
+            stmt_start = time.perf_counter()
+            executed_at = datetime.now().isoformat(sep=" ", timespec="seconds")
+            row_count = None
             try:
-                self.client.cursor.execute(stmt.upper())
-
-                # auto-commit for DDL/DML
-                first = stmt.split()[0].upper()
-                if first in ('CREATE', 'DROP', 'ALTER', 'INSERT', 'UPDATE', 'DELETE'):
-                    self.client.commit()
-                    self.add_message("  └─ committed", "success")
-
-                # if SELECT, show row count and optionally load grid
-                if self.client.cursor.description:
-                    headers = [d[0] for d in self.client.cursor.description]
-                    rows = self.client.cursor.fetchall()
-                    self.add_message(f"  └─ returned {len(rows)} row(s)", "success")
-                    # populate grid with **last** SELECT so user sees something
-                    dt = self.query_one("#results-table")
-                    dt.clear(columns=True)
-                    dt.add_columns(*headers)
-                    dt.add_rows(rows)
+                with self.client.lock:
+                    self.client.cursor.execute(stmt.upper())
+
+                    # if SELECT, show row count and populate grid with the **last** one
+                    if self.client.cursor.description:
+                        description = self.client.cursor.description
+                        rows = self.client.cursor.fetchall()
+                        row_count = len(rows)
+                        last_result = ([d[0] for d in description], rows, description)
+                if row_count is not None:
+                    messages.append((f"  └─ returned {row_count} row(s)", "success"))
+                history.append((stmt, executed_at, time.perf_counter() - stmt_start, row_count, None))
 
             except Exception as e:
-                self.add_message(f"  └─ ERROR: {e}", "error")
+                history.append((stmt, executed_at, time.perf_counter() - stmt_start, None, str(e)))
+                messages.append((f"  └─ ERROR: {e}", "error"))
+                failure = (idx, stmt, str(e))
                 # stop on first failure (remove break to continue anyway)
                 break
-                
-                
-                
 
-    def execute_query(self):
-        """Execute current query with pagination"""
+            executed += 1
+            done = (idx, start_char + end_char, end_byte)
+            since_checkpoint += 1
+            if since_checkpoint >= SCRIPT_CHECKPOINT_EVERY:
+                commit_error = checkpoint()
+                if commit_error is not None:
+                    break
+                since_checkpoint = 0
+                messages.append((f"  └─ committed through statement {idx}", "success"))
+                progress()
+            elif time.perf_counter() - last_progress >= SCRIPT_PROGRESS_SECONDS:
+                progress()
+
+        # A failed statement is rolled back on its own, so everything before it can be kept
+        interrupted = worker.is_cancelled
+        if commit_error is None:
+            commit_error = checkpoint(status="failed" if failure else "interrupted" if interrupted else "completed")
+        if commit_error is not None:
+            # Nothing after the last checkpoint was applied: resume has to re-run it
+            self.client.rollback()
+            failure = (committed[0] + 1, "COMMIT", f"Commit failed: {commit_error}")
+            messages.append((f"  └─ ERROR: {failure[2]} - statements after {committed[0]} rolled back", "error"))
+            self.script_journal.checkpoint(key, status="failed")
+        elapsed = time.perf_counter() - began
+        report = {
+            "started_at": datetime.now().isoformat(sep=" ", timespec="seconds"),
+            "from_statement": start_index + 1,
+            "executed": executed,
+            "elapsed": round(elapsed, 3),
+            "per_second": round(executed / elapsed, 1) if elapsed else None,
+            "failed_statement": failure[0] if failure else None,
+            "error": failure[2] if failure else None,
+            "failed_sql": failure[1][:500] if failure else None,
+            "interrupted": interrupted,
+        }
+        self.script_journal.add_report(key, report)
+        if not interrupted:  # cancelled when the app exits: there is no UI left to update
+            progress()
+            self.call_from_thread(self._script_finished, report, total)
+
+    def _script_progress(self, messages, history, page=None):
+        """Apply a batch of progress from the script worker: log lines, history rows, last SELECT"""
+        panel = self.query_one(MessagePanel)
+        for message, msg_type in messages:
+            panel.add_message(message, msg_type)
+        if history and self.history is not None:
+            try:
+                self.history.record_many(self.current_lib, history)
+            except sqlite3.Error as e:
+                self.add_message(f"History not saved: {e}", "warning")
+        if page is not None:
+            self.show_page(page)
+
+    def _script_finished(self, report: dict, total: int):
+        rate = f"{report['per_second']} stmt/s" if report["per_second"] is not None else "n/a"
+        summary = f"{report['executed']} statement(s) in {report['elapsed']:.1f}s ({rate})"
+        if report["error"]:
+            self.add_message(
+                f"Script stopped at statement {report['failed_statement']}/{total} after {summary} "
+                f"- fix it and press Ctrl+G to resume", "error"
+            )
+            self.query_one(StatusBar).update_status(
+                f"Script failed at {report['failed_statement']}/{total}: {report['error']}", "error"
+            )
+        else:
+            self.add_message(f"Script completed: {summary}", "success")
+            self.query_one(StatusBar).update_status(f"Script completed: {summary}", "success")
+
+    def action_resume_script(self):
+        """Resume the last failed/interrupted script after its last checkpoint (Ctrl+G)"""
+        if self._script_running():
+            self.add_message("A script is still running - wait for it to finish", "warning")
+            return
+        key, entry = self.script_journal.latest_incomplete()
+        if entry is None:
+            self.add_message("No interrupted script to resume", "warning")
+            return
+        start = (entry.get("statement_index", 0), entry.get("char_offset", 0), entry.get("byte_offset", 0))
+        # Only the part that already ran has to match; the rest may have been fixed
+        if entry.get("path"):
+            path = Path(entry["path"])
+            what = path.name
+            try:
+                with open(path, "rb") as f:
+                    prefix = f.read(start[2])
+                    remainder = f.read().decode("utf-8")
+            except (OSError, UnicodeDecodeError) as e:
+                self.add_message(f"Cannot resume {path}: {e}", "error")
+                return
+            source_path = path
+        else:
+            what = "the editor script"
+            script = (self.loaded_sql or self.query_one("#sql", TextArea).text.strip()).encode("utf-8")
+            prefix = script[:start[2]]
+            remainder = script[start[2]:].decode("utf-8", errors="replace")  # prefix check rejects a split char
+            source_path = None
+        prefix_hash = hashlib.sha256(prefix)
+        if len(prefix) != start[2] or prefix_hash.hexdigest() != entry.get("prefix_sha256"):
+            self.add_message(
+                f"The first {start[0]} statement(s) of {what} changed since they ran - cannot resume "
+                f"(only the statements after them may be edited)", "error"
+            )
+            return
+        self.add_message(f"Resuming script after statement {start[0]}", "info")
+        self.query_one(StatusBar).update_status(f"Resuming script after statement {start[0]}...", "query")
+        self._execute_multiple_statements(remainder, source_path, key, start, prefix_hash)
+        self.loaded_sql = ""
+        self.loaded_file_name = ""
+        self.loaded_file_path = None
+
+
+    def execute_query(self, delta: bool = False) -> bool:
+        """Execute current query with pagination (delta=True updates only changed cells).
+        Returns False if the query failed."""
         self.add_message("Executing SQL query...", "query")
         self.query_one(StatusBar).update_status("Executing query...", "query")
         
-        headers, rows, err = self.client.run_query_paginated(
-            self.current_sql, 
-            self.current_offset, 
-            self.page_size
-        )
+        start = time.perf_counter()
+        with self.client.lock:
+            headers, rows, err = self.client.run_query_paginated(
+                self.current_sql, 
+                self.current_offset, 
+                self.page_size
+            )
+            description = self.client.last_description
+        elapsed = time.perf_counter() - start
+        if not delta and self.current_offset == 0:
+            self.record_history(self.current_sql, elapsed, len(rows) if headers else None, err)
         
-        dt = self.query_one("#results-table")
-        dt.clear(columns=True)
+        if err or not delta:
+            self.query_one("#results-table").clear(columns=True)
+            self.current_page_data = None
         
         if err:
             self.add_message(f"SQL Error: {err}", "error")
             self.query_one(StatusBar).update_status(f"Error: {err}", "error")
-            return
+            return False
         
         if headers:
-            dt.add_columns(*headers)
-            dt.add_rows(rows)
-            
-            self.total_rows = len(rows) + self.current_offset
-            if len(rows) >= self.page_size:
-                self.total_rows = (self.current_offset + len(rows)) * 2
-            
-            current_page = (self.current_offset // self.page_size) + 1
-            total_pages = max(1, (self.total_rows + self.page_size - 1) // self.page_size)
-            
-            pg = self.query_one(PaginationBar)
-            pg.current_page = current_page
-            pg.total_pages = total_pages
-            pg.page_size = self.page_size
-            pg.total_rows = self.current_offset + len(rows)
-            pg.update_display()
+            page = ResultPage(headers, rows, description)
+            if delta:
+                self.apply_page_delta(page)
+            else:
+                self.show_page(page)
+            self.update_pagination(len(rows))
             
             self.add_message(f"Query successful - returned {len(rows)} rows", "success")
             self.query_one(StatusBar).update_status(f"Query returned {len(rows)} rows", "success")
         else:
             self.add_message("Query executed successfully (no results)", "info")
             self.query_one(StatusBar).update_status("Query executed (no results)", "info")
+        return True
+
+    def update_pagination(self, row_count: int):
+        """Update the pagination bar for a page of row_count rows at current_offset"""
+        self.total_rows = row_count + self.current_offset
+        if row_count >= self.page_size:
+            self.total_rows = (self.current_offset + row_count) * 2
+        
+        current_page = (self.current_offset // self.page_size) + 1
+        total_pages = max(1, (self.total_rows + self.page_size - 1) // self.page_size)
+        
+        pg = self.query_one(PaginationBar)
+        pg.current_page = current_page
+        pg.total_pages = total_pages
+        pg.page_size = self.page_size
+        pg.total_rows = self.current_offset + row_count
+        pg.update_display()
+
+    def show_page(self, page: ResultPage):
+        """Replace the results grid with a pre-formatted page"""
+        dt = self.query_one("#results-table", ResultGrid)
+        self.current_row_keys = page.row_keys(self._key_indexes(page), self.current_offset)
+        self.current_column_keys = dt.load_page(page, self.current_row_keys)
+        self.current_page_data = page
+
+    def _key_indexes(self, page: ResultPage):
+        """Positions of the current table's key columns in page, or [] if any is missing"""
+        if not self.current_key_columns or not all(c in page.headers for c in self.current_key_columns):
+            return []
+        return [page.headers.index(c) for c in self.current_key_columns]
+
+    @staticmethod
+    def _highlight(cell: Text) -> Text:
+        changed = cell.copy()
+        changed.stylize(f"bold {COLOR_CHANGED_CELL}")
+        return changed
+
+    def apply_page_delta(self, page: ResultPage):
+        """Update the grid in place to show page, touching only rows/cells that changed
+        since the page currently displayed. Changed cells stay highlighted until the
+        next refresh."""
+        previous = self.current_page_data
+        if previous is None or previous.headers != page.headers:
+            self.show_page(page)
+            return (page.row_count, 0, 0)
+        
+        dt = self.query_one("#results-table", ResultGrid)
+        keys = page.row_keys(self._key_indexes(page), self.current_offset)
+        added, removed, changed = page.diff(previous, keys, self.current_row_keys)
+        
+        # In place only when surviving rows keep their order and new rows come last;
+        # otherwise (ORDER BY moved a row, a new row sorts in between) rebuild the grid
+        removed_keys = set(removed)
+        kept = page.row_count - len(added)
+        in_place = (
+            dt.row_count == len(self.current_row_keys)
+            and added == list(range(kept, page.row_count))
+            and [k for k in self.current_row_keys if k not in removed_keys] == keys[:kept]
+        )
+        if in_place:
+            for key in removed:
+                dt.remove_row(key)
+            dt.rebind_rows(page, [(key, row) for row, key in enumerate(keys[:kept])])
+            for row in added:
+                dt.add_page_row(page, row, keys[row])
+            self.current_page_data = page
+            self.current_row_keys = keys
+        else:
+            self.show_page(page)
+        
+        for row, col in changed:
+            dt.update_cell(keys[row], self.current_column_keys[col], self._highlight(page.cell(row, col)))
+        for row in added:
+            for col, column_key in enumerate(self.current_column_keys):
+                dt.update_cell(keys[row], column_key, self._highlight(page.cell(row, col)))
+        return (len(added), len(removed), len(changed))
 
     def load_sql_without_execute(self, sql: str, source: str = "file"):
         """Load SQL into editor without executing"""
@@ -835,20 +2587,287 @@ class SqlApp(App):
             self.execute_query()
 
     def action_refresh(self):
-        """Refresh current query"""
+        """Refresh current query, updating only the cells that changed"""
         if self.current_sql:
             self.add_message("Refreshing query...", "info")
-            self.execute_query()
+            self.execute_query(delta=True)
         else:
             self.add_message("No query to refresh", "warning")
             self.query_one(StatusBar).update_status("No query to refresh", "info")
 
+    def action_toggle_watch(self):
+        """Start/stop re-running the current query every WATCH_INTERVAL_SECONDS"""
+        if self.watch_timer is not None:
+            self.watch_timer.stop()
+            self.watch_timer = None
+            self.add_message("Watch mode stopped", "info")
+            self.query_one(StatusBar).update_status("Watch mode stopped", "info")
+            return
+        if not self.current_sql:
+            self.add_message("No query to watch", "warning")
+            self.query_one(StatusBar).update_status("No query to watch", "info")
+            return
+        if not self._is_simple_select(self.current_sql):
+            self.add_message("Watch mode only re-runs SELECT queries", "warning")
+            self.query_one(StatusBar).update_status("Watch mode only re-runs SELECT queries", "error")
+            return
+        self.watch_timer = self.set_interval(WATCH_INTERVAL_SECONDS, self._watch_tick)
+        self.add_message(f"Watch mode: refreshing every {WATCH_INTERVAL_SECONDS}s ([w] to stop)", "info")
+        self.query_one(StatusBar).update_status(f"Watching every {WATCH_INTERVAL_SECONDS}s", "query")
+
+    def _watch_tick(self):
+        # Skip a tick rather than queue up behind a slow query
+        if self.watch_busy or not self.current_sql:
+            return
+        if not self._is_simple_select(self.current_sql):
+            # A DML/DDL statement was run from the editor since watch started
+            self.action_toggle_watch()
+            return
+        self.watch_busy = True
+        self._watch_fetch(self.current_sql, self.current_offset, self.page_size)
+
+    @work(thread=True, exclusive=True, group="watch")
+    def _watch_fetch(self, sql: str, offset: int, limit: int):
+        """Run the watched query off the UI thread and hand the page back"""
+        start = datetime.now()
+        try:
+            client = self._background_client("watch")
+        except ConnectionError as e:
+            self.call_from_thread(self._apply_watch_result, sql, offset, None, str(e), 0.0)
+            return
+        with client.lock:
+            headers, rows, err = client.run_query_paginated(sql, offset, limit)
+            description = client.last_description
+        page = ResultPage(headers, rows, description) if headers and not err else None
+        elapsed = (datetime.now() - start).total_seconds()
+        self.call_from_thread(self._apply_watch_result, sql, offset, page, err, elapsed)
+
+    def _apply_watch_result(self, sql, offset, page, err, elapsed):
+        self.watch_busy = False
+        if self.watch_timer is None or sql != self.current_sql or offset != self.current_offset:
+            return
+        if err:
+            self.add_message(f"Watch: {err}", "error")
+            self.query_one(StatusBar).update_status(f"Watch error: {err}", "error")
+            return
+        if page is None:
+            return
+        added, removed, changed = self.apply_page_delta(page)
+        self.update_pagination(page.row_count)
+        self.query_one(StatusBar).update_status(
+            f"Watch: +{added} -{removed} ~{changed} cells ({elapsed:.2f}s)", "success"
+        )
+
     def action_clear_table(self):
         """Clear the results table"""
         self.query_one("#results-table").clear(columns=True)
         self.add_message("Results table cleared", "info")
         self.query_one(StatusBar).update_status("Table cleared", "info")
     
+    def action_show_performance(self):
+        """Show index advice and access estimate for the current query/table"""
+        sql = self.current_sql or self.query_one("#sql", TextArea).text.strip()
+        target = sql_target_table(sql, self.current_lib)
+        if target is None and self.current_lib and self.current_table:
+            target = (self.current_lib, self.current_table)
+        if target is None or not target[0]:
+            self.add_message("No table to analyze - select a table or run a query first", "warning")
+            return
+        self.query_one(StatusBar).update_status(f"Analyzing {target[0]}.{target[1]}...", "query")
+        self._load_performance(sql, *target)
+
+    @work(thread=True, exclusive=True, group="performance")
+    def _load_performance(self, sql: str, lib: str, table: str, refresh: bool = False):
+        report = self.index_advisor.analyze(sql, lib, table, refresh)
+        self.call_from_thread(self._show_performance_report, report)
+
+    def _show_performance_report(self, report: dict):
+        unsupported = [p[0] for p in report["predicates"] if p[2] != "index"]
+        if unsupported:
+            self.add_message(f"No index support for: {', '.join(unsupported)}", "warning")
+        self.query_one(StatusBar).update_status(f"Performance: {report['lib']}.{report['table']}", "info")
+        
+        def closed(result) -> None:
+            if result == "refresh":
+                self.query_one(StatusBar).update_status(
+                    f"Re-reading catalog for {report['lib']}.{report['table']}...", "query"
+                )
+                self._load_performance(report["sql"], report["lib"], report["table"], True)
+        
+        self.push_screen(PerformanceScreen(report), closed)
+
+    def action_profile(self):
+        """Profile the columns of the selected table, or of the current query"""
+        sql = self.current_sql or self.query_one("#sql", TextArea).text.strip()
+        table_sql = f"SELECT * FROM {self.current_lib}.{self.current_table}"
+        if self.current_table and (not sql or sql == table_sql or self.sample_note):
+            target, lib, table, sql = f"{self.current_lib}.{self.current_table}", self.current_lib, self.current_table, ""
+        elif sql and self._is_simple_select(sql):
+            target, lib, table = "current query", "", ""
+            sql = sql.rstrip().rstrip(";")
+        else:
+            self.add_message("Nothing to profile - select a table or run a SELECT first", "warning")
+            return
+        self.add_message(f"Profiling {target}...", "query")
+        self.query_one(StatusBar).update_status(f"Profiling {target}...", "query")
+        self._run_profile(target, lib, table, sql)
+
+    @work(thread=True, exclusive=True, group="profile")
+    def _run_profile(self, target: str, lib: str, table: str, sql: str):
+        start = datetime.now()
+        try:
+            rows, note, err = self.profiler.profile(lib, table, sql, client=self._background_client("profile"))
+        except ConnectionError as e:
+            rows, note, err = [], "", str(e)
+        elapsed = (datetime.now() - start).total_seconds()
+        self.call_from_thread(self._show_profile, target, rows, note, err, elapsed)
+
+    def _show_profile(self, target, rows, note, err, elapsed):
+        if err:
+            self.add_message(f"Profile error: {err}", "error")
+            self.query_one(StatusBar).update_status(f"Profile error: {err}", "error")
+            return
+        self.current_key_columns = []
+        self.show_page(ResultPage(ColumnProfiler.HEADERS, rows))
+        self.add_message(f"Profile of {target}: {note} in {elapsed:.2f}s", "success")
+        self.query_one(StatusBar).update_status(f"Profile of {target}: {note}", "success")
+
+    def record_history(self, sql: str, elapsed: float, row_count=None, error=None):
+        """Add an executed statement to the persistent query history"""
+        if self.history is None:
+            return
+        try:
+            self.history.record(sql, self.current_lib, elapsed, row_count, error)
+        except sqlite3.Error as e:
+            self.add_message(f"History not saved: {e}", "warning")
+
+    def action_show_history(self):
+        """Search past queries and recall one into the editor (Ctrl+R)"""
+        if self.history is None:
+            self.add_message(f"Query history unavailable ({HISTORY_DB_PATH})", "warning")
+            return
+        
+        def recall(sql: Optional[str]) -> None:
+            if sql:
+                self.loaded_sql = ""
+                self.loaded_file_name = ""
+                self.query_one("#sql", TextArea).text = sql
+                self.query_one("#sql").focus()
+                self.query_one(StatusBar).update_status("Recalled query from history - Ctrl+E to execute", "info")
+        
+        self.push_screen(HistoryScreen(self.history), recall)
+
+    def _background_client(self, purpose: str):
+        """Connection of its own for one kind of background work ("catalog", "watch",
+        "profile"), opened on first use.
+
+        Kept apart from self.client so a long catalog read, watched query or profile
+        scan never holds the cursor lock the UI thread needs for browsing and queries.
+        """
+        with self.clone_lock:
+            client = self.background_clients.get(purpose)
+            if client is None:
+                client = self.background_clients[purpose] = self.client.clone()
+            return client
+
+    @work(thread=True, group="catalog")
+    def _load_libraries(self):
+        try:
+            libraries = self._background_client("catalog").get_libraries()
+        except ConnectionError as e:
+            self.call_from_thread(self.add_message, f"Completion unavailable: {e}", "warning")
+            return
+        self.call_from_thread(self.completer.set_libraries, libraries)
+
+    @work(thread=True, group="catalog")
+    def _load_catalog(self, lib: str):
+        """Cache a library's tables and columns for completion, off the UI thread"""
+        try:
+            table_columns = self._background_client("catalog").get_library_columns(lib)
+        except ConnectionError as e:
+            self.call_from_thread(self.add_message, f"Completion unavailable: {e}", "warning")
+            return
+        completer = SqlCompleter()
+        completer.add_library(lib, table_columns)
+        self.call_from_thread(self._catalog_loaded, lib, completer, table_columns)
+
+    def _catalog_loaded(self, lib: str, loaded: SqlCompleter, table_columns: dict):
+        self.completer.tables.update(loaded.tables)
+        self.completer.columns.update(loaded.columns)
+        count = sum(len(c) for c in table_columns.values())
+        self.add_message(f"Completion: cached {len(table_columns)} tables / {count} columns of {lib}", "info")
+
+    def _completion_context(self):
+        """Return (statement around the cursor, text of it before the cursor)"""
+        ta = self.query_one("#sql", TextArea)
+        before = ta.get_text_range((0, 0), ta.cursor_location)
+        after = ta.text[len(before):]
+        start = before.rfind(";") + 1
+        end = after.find(";")
+        statement = before[start:] + (after if end < 0 else after[:end])
+        return statement, before[start:]
+
+    @on(TextArea.Changed, "#sql")
+    def on_sql_changed(self, event):
+        hint = self.query_one("#completions", Static)
+        if not self.completer.tables or self.loaded_sql:
+            self.completions = []
+            hint.update("")
+            return
+        statement, before = self._completion_context()
+        _, self.completions = self.completer.complete(statement, before, self.current_lib)
+        hint.update(Text("Ctrl+N: " + "  ".join(self.completions)) if self.completions else "")
+
+    def action_complete(self):
+        """Insert the first completion suggestion at the cursor (Ctrl+N)"""
+        ta = self.query_one("#sql", TextArea)
+        if not ta.has_focus or not self.completions:
+            return
+        statement, before = self._completion_context()
+        prefix, suggestions = self.completer.complete(statement, before, self.current_lib)
+        if not suggestions:
+            return
+        row, col = ta.cursor_location
+        ta.replace(suggestions[0], (row, col - len(prefix)), (row, col))
+
+    def action_compare_tables(self):
+        """Compare two tables by chunk checksums and list differing keys ([d])"""
+        left = f"{self.current_lib}.{self.current_table}" if self.current_table else ""
+        
+        def start(params) -> None:
+            if not params:
+                return
+            tables = []
+            for name in params[:2]:
+                lib, _, table = name.upper().replace("/", ".").rpartition(".")
+                tables.append((lib or self.current_lib, table))
+            if not all(lib for lib, _ in tables):
+                self.add_message("Qualify both tables as LIB.TABLE", "error")
+                return
+            label = f"{tables[0][0]}.{tables[0][1]} vs {tables[1][0]}.{tables[1][1]}"
+            self.add_message(f"Comparing {label}...", "query")
+            self.query_one(StatusBar).update_status(f"Comparing {label}...", "query")
+            self._run_compare(label, tables[0], tables[1], params[2])
+        
+        self.push_screen(CompareScreen(left), start)
+
+    @work(thread=True, exclusive=True, group="compare")
+    def _run_compare(self, label: str, left, right, key_column: str):
+        began = time.perf_counter()
+        progress = lambda message: self.call_from_thread(self.add_message, message, "info")
+        rows, note, err = self.comparer.compare(left, right, key_column, progress)
+        self.call_from_thread(self._show_compare, label, rows, note, err, time.perf_counter() - began)
+
+    def _show_compare(self, label, rows, note, err, elapsed):
+        if err:
+            self.add_message(f"Compare error: {err}", "error")
+            self.query_one(StatusBar).update_status(f"Compare error: {err}", "error")
+            return
+        self.current_key_columns = []
+        self.show_page(ResultPage(TableComparer.HEADERS, rows))
+        self.add_message(f"Compare {label}: {note} in {elapsed:.1f}s", "success" if not rows else "warning")
+        self.query_one(StatusBar).update_status(f"Compare {label}: {note}", "success" if not rows else "error")
+
     def action_show_about(self):
         """Show about dialog"""
         self.push_screen(AboutScreen())
@@ -870,7 +2889,8 @@ class SqlApp(App):
                     return
                 
                 # Read the file
-                with open(path, 'r', encoding='utf-8') as f:
+                # newline='' keeps CRLFs so script byte offsets match the file (for resume)
+                with open(path, 'r', encoding='utf-8', newline='') as f:
                     sql_content = f.read()
                 
                 # Check if SQL is too large for editor
@@ -878,6 +2898,7 @@ class SqlApp(App):
                     # Store in memory, don't load to editor
                     self.loaded_sql = sql_content
                     self.loaded_file_name = path.name
+                    self.loaded_file_path = path
                     
                     # Clear the editor and show indicator
                     self.query_one("#sql", TextArea).text = f"-- FILE LOADED: {path.name} ({len(sql_content)} chars)\n-- Press Ctrl+E to execute\n-- (File too large to display)"
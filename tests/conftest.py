@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# db2tui keeps its query history and script journal in the home directory;
+# point it somewhere disposable before the module is imported
+os.environ["HOME"] = tempfile.mkdtemp(prefix="db2tui-tests-")
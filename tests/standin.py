@@ -0,0 +1,56 @@
+"""Stand-in DB-API connection serving canned rows, for testing without DB2."""
+
+
+class CannedCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        self.connection.executed.append((sql, params))
+        for fragment, headers, rows in self.connection.canned:
+            if fragment in sql:
+                self.description = [(h, None, None, None, None, None, None) for h in headers] or None
+                self._rows = [tuple(r) for r in rows]
+                return
+        raise Exception(f"Stand-in has no canned rows for: {sql}")
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size=1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def close(self):
+        pass
+
+
+class CannedConnection:
+    """Answers each statement with the rows of the first canned (fragment, headers, rows)
+    whose SQL fragment it contains; every statement run is kept in executed."""
+
+    def __init__(self, canned):
+        self.canned = list(canned)
+        self.executed = []
+
+    def cursor(self):
+        return CannedCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+    def count(self, fragment: str) -> int:
+        return sum(1 for sql, _ in self.executed if fragment in sql)
@@ -0,0 +1,138 @@
+import datetime
+import re
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+from decimal import Decimal
+from pathlib import Path
+
+import zlib
+
+import pytest
+
+import db2agent
+from db2agent import (
+    BATCH_ROWS, FLAG_COMPRESSED, FRAME_HEADER, KIND_JSON, MAX_HELLO_BYTES, AgentError, QueryAgent,
+    RemoteConnection, decode_batch, encode_batch, recv_frame, remote_connection_factory, send_frame,
+)
+from db2tui import DB2Client
+
+AGENT = Path(__file__).resolve().parent.parent / "db2agent.py"
+
+
+def test_batch_round_trip_keeps_types_and_nulls():
+    rows = [
+        (1, 1.5, "ÄBC  ", Decimal("12.30"), datetime.datetime(2024, 5, 1, 10, 0, 1, 250),
+         datetime.date(2024, 5, 1), datetime.time(23, 59), b"\x00\xff", True, None),
+        (None, None, None, None, None, None, None, None, None, None),
+        (-(1 << 63), -0.0, "", Decimal("-1E+3"), datetime.datetime(1, 1, 1),
+         datetime.date(9999, 12, 31), datetime.time(0, 0), b"", False, None),
+    ]
+    assert decode_batch(encode_batch(rows, 10)) == rows
+
+
+def test_batch_mixed_and_huge_columns_fall_back_to_text_or_decimal():
+    rows = [(1 << 70, "a"), (2, 3)]
+    decoded = decode_batch(encode_batch(rows, 2))
+    assert decoded == [(Decimal(1 << 70), "a"), (Decimal(2), "3")]
+
+
+def test_empty_batches():
+    assert decode_batch(encode_batch([], 3)) == []
+    assert decode_batch(encode_batch([(), ()], 0)) == [(), ()]
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    path = tmp_path / "agent.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE T (ID INTEGER PRIMARY KEY, NAME TEXT, AMOUNT REAL)")
+    conn.executemany("INSERT INTO T VALUES (?, ?, ?)",
+                     [(i, f"name {i}" if i % 3 else None, i / 4) for i in range(1, 2501)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def agent(sqlite_db):
+    server = QueryAgent(("127.0.0.1", 0), lambda: sqlite3.connect(sqlite_db, check_same_thread=False), "s3cret")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_db2client_over_agent(agent):
+    client = DB2Client(remote_connection_factory(agent, "s3cret"))
+    assert client.connect()[0]
+    headers, rows, err = client.run_query("SELECT ID, NAME, AMOUNT FROM T WHERE ID <= ? ORDER BY ID", [3])
+    assert err is None
+    assert headers == ["ID", "NAME", "AMOUNT"]
+    assert rows == [(1, "name 1", 0.25), (2, "name 2", 0.5), (3, None, 0.75)]
+
+    # More rows than one streamed batch
+    headers, rows, err = client.run_query("SELECT ID FROM T ORDER BY ID")
+    assert len(rows) == 2500 > BATCH_ROWS
+    assert rows[-1] == (2500,)
+
+    client.cursor.execute("SELECT ID FROM T ORDER BY ID")
+    assert client.cursor.fetchone() == (1,)
+    assert client.cursor.fetchmany(2) == [(2,), (3,)]
+
+    headers, rows, err = client.run_query("SELECT * FROM MISSING")
+    assert "MISSING" in err.upper()
+
+
+def test_agent_rejects_wrong_or_empty_token(agent):
+    host, port = agent.split(":")
+    for token in ("", "wrong"):
+        with pytest.raises(AgentError):
+            RemoteConnection(host, int(port), token)
+    with pytest.raises(ValueError):
+        QueryAgent(("127.0.0.1", 0), sqlite3.connect, "")
+
+
+def test_agent_refuses_large_or_compressed_hello(agent):
+    host, port = agent.split(":")
+    hello = b'{"op": "hello", "token": "s3cret"}'
+    for header in (FRAME_HEADER.pack(MAX_HELLO_BYTES + 1, KIND_JSON),
+                   FRAME_HEADER.pack(len(zlib.compress(hello)), KIND_JSON | FLAG_COMPRESSED)):
+        with socket.create_connection((host, int(port)), timeout=5) as sock:
+            sock.sendall(header)
+            kind, reply = recv_frame(sock)
+            assert b'"ok": false' in reply
+    # A hello well past COMPRESS_MIN_BYTES still goes out uncompressed
+    with pytest.raises(AgentError, match="Authentication failed"):
+        RemoteConnection(host, int(port), "x" * 2000)
+
+
+def test_decompressed_size_is_capped(monkeypatch):
+    monkeypatch.setattr(db2agent, "MAX_FRAME_BYTES", 64 * 1024)
+    left, right = socket.socketpair()
+    with left, right:
+        send_frame(left, KIND_JSON, b" " * (64 * 1024))
+        assert recv_frame(right) == (KIND_JSON, b" " * (64 * 1024))
+        send_frame(left, KIND_JSON, b" " * (64 * 1024 + 1))
+        with pytest.raises(AgentError, match="decompressed"):
+            recv_frame(right)
+
+
+def test_sqlite_agent_command_end_to_end(sqlite_db):
+    proc = subprocess.Popen(
+        [sys.executable, str(AGENT), "--sqlite", str(sqlite_db), "--port", "0"],
+        stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        port = int(re.search(r":(\d+)$", proc.stdout.readline().strip()).group(1))
+        token = proc.stdout.readline().strip().rsplit(" ", 1)[-1]
+        client = DB2Client(remote_connection_factory(f"127.0.0.1:{port}", token))
+        assert client.connect()[0]
+        assert client.run_query("SELECT COUNT(*) FROM T")[1] == [(2500,)]
+        client.conn.close()
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
@@ -0,0 +1,58 @@
+import sqlite3
+
+import db2tui
+from db2tui import ConnectionPool, DB2Client, TableComparer
+
+
+def make_comparer(tmp_path, monkeypatch, left_rows, right_rows, pool_size=2):
+    """TableComparer over SQLite tables APP.L and APP.R with columns (K, V)"""
+    monkeypatch.setattr(db2tui, "COMPARE_ROW_HASH_SQL", "(R.\"V\" * 7919 + R.\"K\")")
+    path = tmp_path / "app.db"
+    with sqlite3.connect(str(path)) as db:
+        for table, rows in (("L", left_rows), ("R", right_rows)):
+            db.execute(f"CREATE TABLE {table} (K INT, V INT)")
+            db.executemany(f"INSERT INTO {table} VALUES (?, ?)", rows)
+
+    def connect():
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        conn.execute("ATTACH DATABASE ? AS APP", (str(path),))
+        return conn
+
+    client = DB2Client(connect)
+    client.connect()
+    client.get_columns = lambda lib, table: [("K", "INTEGER"), ("V", "INTEGER")]
+    client.get_key_columns = lambda lib, table: ["K"]
+    return TableComparer(client, ConnectionPool(client, pool_size))
+
+
+def test_duplicate_keys_are_compared_as_multisets(tmp_path, monkeypatch):
+    rows = [(k, k) for k in range(1, 101)]
+    comparer = make_comparer(tmp_path, monkeypatch, rows, rows + [(5, 500), (7, 7), (9, 9)])
+    result, note, err = comparer.compare(("APP", "L"), ("APP", "R"))
+    assert err is None
+    assert [(k, diff) for _, k, diff in result] == [(5, "1 vs 2 rows"), (7, "1 vs 2 rows"), (9, "1 vs 2 rows")]
+
+
+def test_drill_down_stops_fetching_at_the_difference_cap(tmp_path, monkeypatch):
+    monkeypatch.setattr(db2tui, "COMPARE_MAX_DIFFERENCES", 3)
+    fetched = []
+    row_hashes = TableComparer._row_hashes
+    monkeypatch.setattr(TableComparer, "_row_hashes",
+                        lambda self, *args: fetched.append(args[0:2]) or row_hashes(self, *args))
+    comparer = make_comparer(
+        tmp_path, monkeypatch, [(k, k) for k in range(1, 321)], [(k, -k) for k in range(1, 321)]
+    )
+    result, note, err = comparer.compare(("APP", "L"), ("APP", "R"))
+    assert err is None
+    assert len(result) == 3 and "32/33 ranges differ" in note and "(first 3 shown)" in note
+    # One chunk in flight plus the one being compared, not all 32
+    assert len(fetched) <= 4
+
+
+def test_rows_with_null_keys_are_compared(tmp_path, monkeypatch):
+    rows = [(k, k) for k in range(1, 101)]
+    comparer = make_comparer(tmp_path, monkeypatch, rows + [(None, 1)], rows + [(None, 2), (None, 3)])
+    result, note, err = comparer.compare(("APP", "L"), ("APP", "R"))
+    assert err is None
+    assert [(k, diff) for _, k, diff in result] == [(None, "1 vs 2 rows")]
+    assert "1/33 ranges differ" in note and note.endswith("NULL keys: 1 vs 2 rows")
@@ -0,0 +1,67 @@
+import asyncio
+
+from db2tui import DB2Client, SqlApp, SqlCompleter
+from standin import CannedConnection
+
+
+def make_completer():
+    completer = SqlCompleter()
+    completer.set_libraries(["APP", "APPHIST", "QSYS2"])
+    completer.add_library("APP", {
+        "ORDERS": ["ORDER_ID", "CUSTNO", "STATUS"],
+        "CUSTOMERS": ["CUSTNO", "NAME"],
+    })
+    return completer
+
+
+def test_columns_of_referenced_tables_then_tables_then_libraries():
+    completer = make_completer()
+    sql = "SELECT CU FROM APP.ORDERS"
+    assert completer.complete(sql, "SELECT CU", "APP") == ("CU", ["CUSTNO", "CUSTOMERS"])
+    assert completer.complete("SELECT * FROM A", "SELECT * FROM A", "APP") == ("A", ["APP", "APPHIST"])
+
+
+def test_alias_and_table_qualifiers():
+    completer = make_completer()
+    sql = "SELECT o.st FROM app.orders o JOIN app.customers AS c ON c.custno = o.custno"
+    assert completer.complete(sql, "SELECT o.st", "") == ("st", ["STATUS"])
+    assert completer.complete(sql, "SELECT c.", "") == ("", ["CUSTNO", "NAME"])
+    assert completer.complete(sql, "SELECT customers.n", "") == ("n", ["NAME"])
+
+
+def test_library_qualifier_lists_tables():
+    completer = make_completer()
+    assert completer.complete("SELECT * FROM app/cu", "SELECT * FROM app/cu", "") == ("cu", ["CUSTOMERS"])
+    assert completer.complete("SELECT * FROM NOPE.X", "SELECT * FROM NOPE.X", "") == ("X", [])
+
+
+def test_nothing_to_complete_after_whitespace():
+    assert make_completer().complete("SELECT ", "SELECT ", "APP") == ("", [])
+
+
+def test_catalog_loads_on_its_own_connection():
+    connections = []
+
+    def connect():
+        conn = CannedConnection([
+            ("QSYS2.SYSTABLES", ["TABLE_NAME"], [("ORDERS",)]),
+            ("QSYS2.SYSCOLUMNS", ["TABLE_NAME", "COLUMN_NAME"], [("ORDERS", "ORDER_ID"), ("ORDERS", "STATUS")]),
+            ("QSYS2.SYSSCHEMAS", ["SCHEMA_NAME"], [("APP",)]),
+        ])
+        connections.append(conn)
+        return conn
+
+    async def run():
+        app = SqlApp()
+        app.client = DB2Client(connect)
+        async with app.run_test() as pilot:
+            await pilot.click("#lib")
+            await pilot.press("A", "P", "P", "enter")
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            assert app.completer.columns[("APP", "ORDERS")].names == ["ORDER_ID", "STATUS"]
+
+    asyncio.run(run())
+    ui, catalog = connections
+    assert ui.count("SYSCOLUMNS") == 0 and ui.count("SYSTABLES") == 1
+    assert catalog.count("SYSCOLUMNS") == 1 and catalog.count("SYSSCHEMAS") == 1
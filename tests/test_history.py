@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+from textual.widgets import TextArea
+
+from db2tui import DB2Client, QueryHistory, SqlApp
+from standin import CannedConnection
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = QueryHistory(tmp_path / "history.db")
+    history.record("SELECT * FROM APP.ORDERS", "APP", 0.5, 10)
+    history.record("SELECT * FROM APP.ORDHIST WHERE ID = 1", "APP", 0.25, 1)
+    history.record("UPDATE APP.CUSTOMERS SET NAME = 'X'", "APP", 0.1, None, "SQL0204")
+    return history
+
+
+def sql_of(rows):
+    return [row[1] for row in rows]
+
+
+def test_record_and_record_many(history):
+    history.record_many("LIB2", [
+        ("INSERT INTO T VALUES (1)", "2026-01-02 03:04:05", 0.01, None, None),
+        ("INSERT INTO NOPE VALUES (2)", "2026-01-02 03:04:06", 0.02, None, "SQL0204"),
+    ])
+    latest = history.search("")
+    assert [row[1:] for row in latest[:2]] == [
+        ("INSERT INTO NOPE VALUES (2)", "2026-01-02 03:04:06", "LIB2", 0.02, None, "SQL0204"),
+        ("INSERT INTO T VALUES (1)", "2026-01-02 03:04:05", "LIB2", 0.01, None, None),
+    ]
+    _, sql, _, library, elapsed, row_count, error = latest[2]
+    assert (sql, library, elapsed, row_count, error) == ("UPDATE APP.CUSTOMERS SET NAME = 'X'", "APP", 0.1, None, "SQL0204")
+    assert len(latest) == 5
+
+
+@pytest.mark.parametrize("fts", [True, False])
+def test_word_prefix_search_newest_first(history, fts):
+    if fts and not history.has_fts:
+        pytest.skip("SQLite built without FTS5")
+    history.has_fts = fts  # False exercises the LIKE fallback on the same data
+    assert sql_of(history.search("ord sel")) == [
+        "SELECT * FROM APP.ORDHIST WHERE ID = 1", "SELECT * FROM APP.ORDERS",
+    ]
+    assert sql_of(history.search("cust")) == ["UPDATE APP.CUSTOMERS SET NAME = 'X'"]
+    assert sql_of(history.search("select", limit=1)) == ["SELECT * FROM APP.ORDHIST WHERE ID = 1"]
+
+
+def test_fuzzy_fallback_ranks_tightest_match_then_newest(tmp_path):
+    history = QueryHistory(tmp_path / "history.db")
+    for sql in ("SELECT FOO FROM ORDERS", "SET FOO = 1", "SET FOX = 2", "DELETE FROM X"):
+        history.record(sql, "APP", 0.1)
+    # No word starts with "sfo", so every entry is matched as s..f..o
+    assert sql_of(history.search("sfo")) == ["SET FOX = 2", "SET FOO = 1", "SELECT FOO FROM ORDERS"]
+
+
+def test_previous_elapsed_skips_failed_runs(history):
+    sql = "SELECT COUNT(*) FROM APP.ORDERS"
+    history.record(sql, "APP", 1.0, 1)
+    history.record(sql, "APP", 9.0, None, "SQL0913")
+    history.record(sql, "APP", 3.0, 1)
+    ids = [row[0] for row in history.search("count")]
+    assert history.previous_elapsed(ids[0], sql) == 1.0
+    assert history.previous_elapsed(ids[-1], sql) is None
+
+
+def test_history_screen_recalls_into_the_editor(history):
+    async def run():
+        app = SqlApp()
+        app.client = DB2Client(lambda: CannedConnection([]))
+        app.history = history
+        async with app.run_test() as pilot:
+            await pilot.press("ctrl+r")
+            await pilot.pause()
+            await pilot.press(*"cust", "enter")
+            await pilot.pause()
+            assert app.query_one("#sql", TextArea).text == "UPDATE APP.CUSTOMERS SET NAME = 'X'"
+
+    asyncio.run(run())
@@ -0,0 +1,88 @@
+import asyncio
+
+from db2tui import (
+    DB2Client, IndexAdvisor, PerformanceScreen, SqlApp, sql_predicate_columns, sql_target_table,
+)
+from standin import CannedConnection
+
+CATALOG = [
+    ("QSYS2.SYSIXADV", ["KEY_COLUMNS_ADVISED", "INDEX_TYPE", "TIMES_ADVISED", "LAST_ADVISED",
+                        "REASON_ADVISED", "AVERAGE_QUERY_ESTIMATE"],
+     [("STATUS", "RADIX", 42, "2024-05-01 10:00:00", "I1", 3)]),
+    ("QSYS2.SYSINDEXES", ["INDEX_NAME", "COLUMN_NAME", "ORDINAL_POSITION"],
+     [("ORDERS_PK", "ORDER_ID", 1), ("ORDERS_CUST", "CUSTNO", 1), ("ORDERS_CUST", "CREATED", 2)]),
+    ("QSYS2.SYSTABLESTAT", ["ROWS"], [(1_250_000,)]),
+    ("QSYS2.SYSSCHEMAS", ["SCHEMA_NAME"], [("APP",)]),
+]
+
+
+def make_advisor():
+    conn = CannedConnection(CATALOG)
+    client = DB2Client(lambda: conn)
+    assert client.connect()[0]
+    return IndexAdvisor(client), conn
+
+
+def test_sql_target_and_predicates():
+    sql = "SELECT * FROM app.orders WHERE status = 'O' AND (custno = ? OR created >= ?) ORDER BY 1"
+    assert sql_target_table(sql) == ("APP", "ORDERS")
+    assert sql_target_table("SELECT * FROM orders", "LIB") == ("LIB", "ORDERS")
+    assert sql_predicate_columns(sql) == [("STATUS", "="), ("CUSTNO", "="), ("CREATED", ">=")]
+
+
+def test_analyze_classifies_predicates():
+    advisor, _ = make_advisor()
+    report = advisor.analyze(
+        "SELECT * FROM APP.ORDERS WHERE CUSTNO = 'C1' AND CREATED > CURRENT DATE AND STATUS = 'O'",
+        "APP", "ORDERS",
+    )
+    assert report["rows"] == 1_250_000
+    assert report["indexes"] == {"ORDERS_PK": ["ORDER_ID"], "ORDERS_CUST": ["CUSTNO", "CREATED"]}
+    assert report["predicates"] == [
+        ("CUSTNO", "=", "index", None),
+        ("CREATED", ">", "non-leading key", 1_250_000),
+        ("STATUS", "=", "none", 1_250_000),
+    ]
+    assert not report["full_scan"]
+    assert report["advice"][0][0] == "STATUS"
+
+
+def test_full_scan_without_usable_index():
+    advisor, _ = make_advisor()
+    report = advisor.analyze("SELECT * FROM APP.ORDERS WHERE CUSTNO <> 'C1'", "APP", "ORDERS")
+    assert report["full_scan"]
+    assert advisor.analyze("SELECT * FROM APP.ORDERS", "APP", "ORDERS")["full_scan"]
+
+
+def test_catalog_facts_are_cached_per_table_until_refresh():
+    advisor, conn = make_advisor()
+    advisor.analyze("SELECT * FROM APP.ORDERS WHERE STATUS = 'O'", "APP", "ORDERS")
+    advisor.analyze("SELECT * FROM APP.ORDERS WHERE CUSTNO = 'C'", "app", "orders")
+    assert conn.count("SYSIXADV") == 1
+    advisor.analyze("SELECT * FROM APP.ORDERS", "APP", "ORDERS", refresh=True)
+    assert conn.count("SYSIXADV") == 2
+
+
+def test_performance_panel_refresh_rereads_catalog():
+    conn = CannedConnection(CATALOG)
+
+    async def run():
+        app = SqlApp()
+        app.client = DB2Client(lambda: conn)
+        app.index_advisor = IndexAdvisor(app.client)
+        async with app.run_test() as pilot:
+            app.current_lib = "APP"
+            app.current_sql = "SELECT * FROM APP.ORDERS WHERE STATUS = 'O'"
+            app.action_show_performance()
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            assert isinstance(app.screen, PerformanceScreen)
+            assert conn.count("SYSIXADV") == 1
+
+            await pilot.press("r")
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            assert isinstance(app.screen, PerformanceScreen)
+            assert conn.count("SYSIXADV") == 2
+
+    asyncio.run(run())
@@ -0,0 +1,29 @@
+from db2tui import NameIndex
+
+
+def names(index, positions):
+    return [index.names[p] for p in positions]
+
+
+def test_prefix_matches_come_before_substring_matches():
+    index = NameIndex(["ORDERS", "CUSTORD", "ORDHIST", "ITEMS", "BACKORDERS", "orders_x"])
+    assert names(index, index.search("ord")) == ["ORDERS", "orders_x", "ORDHIST", "BACKORDERS", "CUSTORD"]
+    assert names(index, index.search("or")) == ["ORDERS", "orders_x", "ORDHIST", "BACKORDERS", "CUSTORD"]
+
+
+def test_empty_and_missing_searches():
+    index = NameIndex(["B", "A", "A"])
+    assert names(index, index.search("  ")) == ["A", "B"]
+    assert list(index.search("zzz")) == []
+
+
+def test_prefix_only_index_still_finds_substrings_by_scan():
+    index = NameIndex(["ORDERS", "BACKORDERS"], substring=False)
+    assert names(index, index.search("ORDER")) == ["ORDERS", "BACKORDERS"]
+    assert index.starting_with("ba", 5) == ["BACKORDERS"]
+
+
+def test_large_library_search_uses_trigrams():
+    index = NameIndex([f"T{i:05d}" for i in range(8000)] + ["XORDERX"])
+    assert names(index, index.search("T0799")) == [f"T0799{i}" for i in range(10)]
+    assert names(index, index.search("RDE")) == ["XORDERX"]
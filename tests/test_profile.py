@@ -0,0 +1,89 @@
+import asyncio
+
+from db2tui import (PROFILE_SAMPLE_ROWS_THRESHOLD, ColumnProfiler, DB2Client, SqlApp, StatusBar,
+                    build_profile_sql)
+from standin import CannedConnection
+
+CATALOG = [
+    ("QSYS2.SYSCOLUMNS", ["COLUMN_NAME", "DATA_TYPE"], [("ID", "INTEGER"), ("DOC", "CLOB"), ("NAME", "VARCHAR")]),
+    ("QSYS2.SYSTABLESTAT", ["N"], [(1000,)]),
+]
+# COUNT(*), then COUNT/MIN/MAX/DISTINCT per column
+PROFILE_ROW = (1000, 1000, 1, 1000, 1000, 990, None, None, None, 800, "ADAMS", "ZHU", 612)
+PROFILE_HEADERS = [f"C{i}" for i in range(len(PROFILE_ROW))]
+
+
+def make_profiler(canned):
+    conn = CannedConnection(canned)
+    client = DB2Client(lambda: conn)
+    client.connect()
+    return ColumnProfiler(client), conn
+
+
+def test_profile_sql_has_four_aggregates_per_column_and_skips_lob_min_max():
+    sql = build_profile_sql("APP.T", [("ID", "INTEGER"), ("DOC", "CLOB"), ("A\"B", frozenset({"VARCHAR"}))])
+    assert sql == (
+        'SELECT COUNT(*), COUNT(T."ID"), MIN(T."ID"), MAX(T."ID"), APPROX_COUNT_DISTINCT(T."ID"), '
+        'COUNT(T."DOC"), CAST(NULL AS VARCHAR(1)), CAST(NULL AS VARCHAR(1)), CAST(NULL AS BIGINT), '
+        'COUNT(T."A""B"), MIN(T."A""B"), MAX(T."A""B"), APPROX_COUNT_DISTINCT(T."A""B") FROM APP.T T'
+    )
+    sampled = build_profile_sql("(SELECT 1 X FROM Y)", [("X", "INTEGER")], 1.0, "COUNT(DISTINCT {})")
+    assert sampled.endswith('COUNT(DISTINCT T."X") FROM (SELECT 1 X FROM Y) T WHERE RAND() < 0.01')
+
+
+def test_profile_rows_and_fallback_to_exact_distinct_counts():
+    # No canned rows for APPROX_COUNT_DISTINCT, so the first attempt fails like an older DB2 would
+    profiler, conn = make_profiler(CATALOG + [("COUNT(DISTINCT", PROFILE_HEADERS, [PROFILE_ROW])])
+    rows, note, err = profiler.profile("APP", "T")
+    assert err is None
+    assert conn.count("APPROX_COUNT_DISTINCT") == 1 and conn.count("COUNT(DISTINCT") == 1
+    assert rows == [
+        ("ID", "INTEGER", 1000, 0, "0.0", 1, 1000, 1000),
+        ("DOC", "CLOB", 990, 10, "1.0", None, None, None),
+        ("NAME", "VARCHAR", 800, 200, "20.0", "ADAMS", "ZHU", 612),
+    ]
+    assert note == "3 columns, 1,000 rows"
+
+
+def test_large_tables_are_sampled():
+    estimate = [("QSYS2.SYSTABLESTAT", ["N"], [(PROFILE_SAMPLE_ROWS_THRESHOLD + 1,)])]
+    profiler, conn = make_profiler(estimate + CATALOG + [("APPROX_COUNT_DISTINCT", PROFILE_HEADERS, [PROFILE_ROW])])
+    rows, note, err = profiler.profile("APP", "T")
+    assert err is None and note.endswith("(1.0% sample)")
+    assert conn.count("WHERE RAND() < 0.01") == 1
+
+
+def test_profiles_are_cached_until_refreshed():
+    profiler, conn = make_profiler(CATALOG + [("APPROX_COUNT_DISTINCT", PROFILE_HEADERS, [PROFILE_ROW])])
+    first = profiler.profile("APP", "T")
+    rows, note, err = profiler.profile("app", "t")
+    assert rows == first[0] and note == first[1] + " (cached)"
+    assert conn.count("APPROX_COUNT_DISTINCT") == 1
+    profiler.profile("APP", "T", refresh=True)
+    assert conn.count("APPROX_COUNT_DISTINCT") == 2
+
+
+def test_app_profiles_on_its_own_connection():
+    connections = []
+
+    def connect():
+        conn = CannedConnection(CATALOG + [("APPROX_COUNT_DISTINCT", PROFILE_HEADERS, [PROFILE_ROW])])
+        connections.append(conn)
+        return conn
+
+    async def run():
+        app = SqlApp()
+        app.client = DB2Client(connect)
+        app.profiler = ColumnProfiler(app.client)
+        async with app.run_test() as pilot:
+            app.current_lib, app.current_table = "APP", "T"
+            app.action_profile()
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            assert "Profile of APP.T" in str(app.query_one(StatusBar).render())
+            assert app.query_one("#results-table").row_count == 3
+
+    asyncio.run(run())
+    ui, *others = connections
+    assert ui.count("APPROX_COUNT_DISTINCT") == 0
+    assert sum(conn.count("APPROX_COUNT_DISTINCT") for conn in others) == 1
@@ -0,0 +1,66 @@
+from datetime import datetime
+from decimal import Decimal
+
+from db2tui import NULL_DISPLAY, PageRow, ResultPage
+
+HEADERS = ["ID", "CODE", "AMOUNT", "NOTE"]
+DESCRIPTION = [("ID", frozenset({"INTEGER"})), ("CODE", frozenset({"CHAR"})),
+               ("AMOUNT", frozenset({"DECIMAL"})), ("NOTE", frozenset({"VARCHAR"}))]
+
+
+def make_page(rows):
+    return ResultPage(HEADERS, rows, DESCRIPTION)
+
+
+def test_columns_are_formatted_once_and_dictionary_encoded():
+    page = make_page([
+        (1, "A   ", Decimal("1.0"), None),
+        (2, "A   ", Decimal("1.00"), "[b]x[/b]"),
+        (3, "B   ", Decimal("1.0"), None),
+    ])
+    assert page.kinds == ["number", "text", "number", "text"]
+    assert page.dictionaries[1] == ["A", "B"]             # CHAR padding trimmed, repeats shared
+    assert page.dictionaries[2] == ["1.0", "1.00"]        # equal Decimals that display differently
+    assert page.codes[1].typecode == "B"
+    assert page.value(0, 3) is None and page.plain(0, 3) == NULL_DISPLAY
+    # Cells are literal text, not markup, and numbers are right-aligned
+    assert page.cell(1, 3).plain == "[b]x[/b]"
+    assert page.cell(0, 0).justify == "right" and page.cell(0, 1).justify == "left"
+
+
+def test_kind_falls_back_to_sample_values_without_description():
+    page = ResultPage(["N", "B", "T"], [(1.5, b"\x01\xab", datetime(2024, 1, 2))])
+    assert page.kinds == ["number", "binary", "text"]
+    assert page.plain(0, 0) == "1.5" and page.plain(0, 1) == "01AB"
+
+
+def test_row_keys_use_key_columns_only_when_unique():
+    page = make_page([(1, "A", 1, None), (2, "A", 2, None)])
+    assert page.row_keys([0]) == ["1", "2"]
+    assert page.row_keys([1], offset=50) == ["50", "51"]
+    assert page.row_keys([], offset=10) == ["10", "11"]
+
+
+def test_diff_reports_added_removed_and_changed_cells():
+    before = make_page([(1, "A", 1, None), (2, "B", 2, None), (3, "C", 3, None)])
+    after = make_page([(1, "A", 1, "new"), (3, "C", 4, None), (4, "D", 5, None)])
+    added, removed, changed = after.diff(before, after.row_keys([0]), before.row_keys([0]))
+    assert added == [2]
+    assert removed == ["2"]
+    assert changed == [(0, 3), (1, 2)]
+
+
+def test_diff_distinguishes_null_from_the_text_null():
+    before = make_page([(1, "A", 1, None)])
+    after = make_page([(1, "A", 1, NULL_DISPLAY)])
+    assert after.diff(before, ["1"], ["1"])[2] == [(0, 3)]
+
+
+def test_page_row_reads_through_to_the_page_with_overrides():
+    page = make_page([(1, "A", 1, None), (2, "B", 2, "x")])
+    row = PageRow(page, 1, {"c0": 0, "c1": 1, "c2": 2, "c3": 3})
+    assert [row[k].plain for k in row] == ["2", "B", "2", "x"]
+    row["c1"] = "override"
+    assert row["c1"] == "override"
+    row.page, row.index, row.overrides = page, 0, None
+    assert row["c1"].plain == "A" and len(row) == 4
@@ -0,0 +1,74 @@
+import asyncio
+import re
+from types import SimpleNamespace
+
+from db2tui import PREVIEW_MAX_RRNS, PREVIEW_OVERSAMPLE, DB2Client, SqlApp, StatusBar, TableItem, build_sample_sql
+from standin import CannedConnection
+
+
+def sampled_rrns(sql):
+    return [int(n) for n in re.search(r"IN \(([^)]*)\)", sql).group(1).split(", ")]
+
+
+def test_rrn_sample_spans_deleted_record_slots_and_is_shuffled():
+    sql, note = build_sample_sql("APP", "ORDERS", [], 1000, 50, "RRN", deleted=9000)
+    rrns = sampled_rrns(sql)
+    # Only a tenth of the slots are live, so ten times as many RRNs are drawn
+    assert len(rrns) == int(50 * PREVIEW_OVERSAMPLE * 10)
+    assert max(rrns) > 1000 and max(rrns) <= 10000
+    assert sql.endswith(" ORDER BY RAND()")
+    assert note == "RRN sample ~50 of 1,000 rows (5%)"
+
+
+def test_rrn_sample_draws_are_uniform_over_the_range():
+    highs = 0
+    for _ in range(50):
+        rrns = sampled_rrns(build_sample_sql("APP", "T", [], 100_000, 50, "RRN")[0])
+        highs += sum(1 for r in rrns if r > 50_000)
+    assert 0.4 < highs / (50 * 75) < 0.6
+
+
+def test_tablesample_and_projection():
+    sql, _ = build_sample_sql("APP", "T", ["A", 'B"C'], 1_000_000, 100, "TABLESAMPLE")
+    assert sql == ('SELECT T."A", T."B""C" FROM APP.T T TABLESAMPLE SYSTEM(0.015000) ORDER BY RAND()')
+
+
+def test_rrn_sample_of_mostly_deleted_file_falls_back_to_tablesample():
+    sql, note = build_sample_sql("APP", "T", [], 100_000, 500, "RRN", deleted=20_000_000)
+    assert "RRN(T)" not in sql and len(sql) < 200
+    assert sql == "SELECT T.* FROM APP.T T TABLESAMPLE SYSTEM(0.750000) ORDER BY RAND()"
+    assert note.startswith("TABLESAMPLE sample ~500 of 100,000 rows") and "too many for RRN" in note
+    # Just under the cap still draws record numbers
+    rows = int(PREVIEW_MAX_RRNS / PREVIEW_OVERSAMPLE)
+    assert len(sampled_rrns(build_sample_sql("APP", "T", [], 100_000, rows, "RRN")[0])) <= PREVIEW_MAX_RRNS
+
+
+def test_row_stats_come_from_one_catalog_read():
+    conn = CannedConnection([("SUM(NUMBER_DELETED_ROWS)", ["N", "D"], [(1000, None)])])
+    client = DB2Client(lambda: conn)
+    client.connect()
+    assert client.get_row_stats("app", "t") == (1000, 0)
+    assert conn.count("SYSTABLESTAT") == 1 and conn.count("SUM(NUMBER_ROWS)") == 1
+
+
+def test_failed_sample_preview_reports_the_error():
+    conn = CannedConnection([
+        ("SUM(NUMBER_DELETED_ROWS)", ["N", "D"], [(100_000, 0)]),
+        ("QSYS2.SYSCOLUMNS", ["COLUMN_NAME", "DATA_TYPE"], [("ID", "INTEGER")]),
+        ("QSYS2.SYSKEYCST", ["COLUMN_NAME"], []),
+        ("QSYS2.SYSSCHEMAS", ["SCHEMA_NAME"], []),
+    ])
+
+    async def run():
+        app = SqlApp()
+        app.client = DB2Client(lambda: conn)
+        async with app.run_test() as pilot:
+            app.current_lib = "APP"
+            app.sample_preview = True
+            app.on_select(SimpleNamespace(item=TableItem("ORDERS")))
+            await pilot.pause()
+            status = str(app.query_one(StatusBar).render())
+            assert "RRN(T)" in app.current_sql
+            assert "Error:" in status and "Preview" not in status
+
+    asyncio.run(run())
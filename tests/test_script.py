@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+
+from textual.widgets import TextArea
+
+import db2tui
+from db2tui import DB2Client, MessagePanel, ScriptJournal, SqlApp, iter_sql_statements
+from standin import CannedConnection
+
+
+def test_statements_are_numbered_with_char_and_byte_offsets():
+    script = "CREATE TABLE T (A INT);\n\n  ;INSERT INTO T VALUES ('é');\nSELECT * FROM T"
+    statements = list(iter_sql_statements(script))
+    assert [(i, s) for i, s, _, _ in statements] == [
+        (1, "CREATE TABLE T (A INT)"),
+        (2, "INSERT INTO T VALUES ('é')"),
+        (3, "SELECT * FROM T"),
+    ]
+    for _, stmt, end_char, end_byte in statements:
+        assert script[:end_char].rstrip(";").endswith(stmt)
+        assert end_byte == len(script[:end_char].encode("utf-8"))
+
+
+def test_resuming_continues_numbering_and_offsets():
+    script = "A;B;C;"
+    _, _, end_char, end_byte = list(iter_sql_statements(script))[0]
+    rest = list(iter_sql_statements(script[end_char:], 1, end_byte))
+    assert rest == [(2, "B", 2, 4), (3, "C", 4, 6)]
+
+
+def test_journal_keeps_only_recent_runs(tmp_path):
+    journal = ScriptJournal(tmp_path / "journal.json")
+    for i in range(ScriptJournal.MAX_ENTRIES + 5):
+        journal.checkpoint(f"done{i}", status="completed")
+    for i in range(ScriptJournal.MAX_ENTRIES + 2):
+        journal.checkpoint(f"failed{i}", status="failed")
+    journal.checkpoint("done0", status="running")  # pruned already: starts over as a new run
+    entries = ScriptJournal(tmp_path / "journal.json").entries
+    completed = {k for k, e in entries.items() if e["status"] == "completed"}
+    unfinished = {k for k, e in entries.items() if e["status"] != "completed"}
+    assert completed == {f"done{i}" for i in range(5, ScriptJournal.MAX_ENTRIES + 5)}
+    assert len(unfinished) == ScriptJournal.MAX_ENTRIES and "done0" in unfinished
+    assert "failed0" not in unfinished and "failed1" not in unfinished
+    assert journal.latest_incomplete()[0] == "done0"
+
+
+def run_script_app(connect, journal, steps):
+    async def run():
+        app = SqlApp()
+        app.client = DB2Client(connect)
+        app.script_journal = journal
+        async with app.run_test() as pilot:
+            await steps(app, pilot)
+
+    asyncio.run(run())
+
+
+def test_failed_script_resumes_after_the_unchanged_prefix(tmp_path, monkeypatch):
+    monkeypatch.setattr(db2tui, "SCRIPT_CHECKPOINT_EVERY", 2)
+    db_path = tmp_path / "t.db"
+    journal = ScriptJournal(tmp_path / "journal.json")
+    script = ("CREATE TABLE T (A INT);INSERT INTO T VALUES (1);INSERT INTO T VALUES (2);"
+              "INSERT INTO NOPE VALUES (3);INSERT INTO T VALUES (4);")
+
+    async def steps(app, pilot):
+        editor = app.query_one("#sql", TextArea)
+        editor.load_text(script)
+        await pilot.press("ctrl+e")
+        await app.workers.wait_for_complete()
+        await pilot.pause()
+        key, entry = journal.latest_incomplete()
+        assert entry["status"] == "failed" and entry["statement_index"] == 3
+        assert script[:entry["char_offset"]].endswith("VALUES (2);")
+        assert entry["prefix_sha256"] == hashlib.sha256(script.encode()[:entry["byte_offset"]]).hexdigest()
+
+        # Changing the part that already ran is refused; fixing the failed statement is not
+        editor.load_text(script.replace("(1)", "(9)").replace("NOPE", "T"))
+        await pilot.press("ctrl+g")
+        await app.workers.wait_for_complete()
+        assert journal.latest_incomplete()[0] == key
+        editor.load_text(script.replace("NOPE", "T"))
+        await pilot.press("ctrl+g")
+        await app.workers.wait_for_complete()
+        await pilot.pause()
+        assert journal.entries[key]["status"] == "completed"
+        assert journal.entries[key]["reports"][-1]["executed"] == 2
+
+    run_script_app(lambda: sqlite3.connect(str(db_path), check_same_thread=False), journal, steps)
+    rows = sqlite3.connect(str(db_path)).execute("SELECT A FROM T ORDER BY A").fetchall()
+    assert rows == [(1,), (2,), (3,), (4,)]
+
+
+def test_statements_run_in_one_transaction_per_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(db2tui, "SCRIPT_CHECKPOINT_EVERY", 2)
+    commits = []
+
+    class CountingConnection(CannedConnection):
+        def commit(self):
+            commits.append(self.count("INSERT"))
+
+    conn = CountingConnection([("", [], [])])
+    script = ";".join(f"INSERT INTO T VALUES ({i})" for i in range(5))
+
+    async def steps(app, pilot):
+        app.query_one("#sql", TextArea).load_text(script)
+        await pilot.press("ctrl+e")
+        await app.workers.wait_for_complete()
+
+    run_script_app(lambda: conn, ScriptJournal(tmp_path / "journal.json"), steps)
+    assert commits == [2, 4, 5]
+
+
+def test_failed_commit_keeps_the_previous_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(db2tui, "SCRIPT_CHECKPOINT_EVERY", 2)
+
+    class FailingCommitConnection(CannedConnection):
+        commits = rollbacks = 0
+
+        def commit(self):
+            self.commits += 1
+            if self.commits == 2:
+                raise Exception("SQL0913 row or object in use")
+
+        def rollback(self):
+            self.rollbacks += 1
+
+    conn = FailingCommitConnection([("", [], [])])
+    journal = ScriptJournal(tmp_path / "journal.json")
+    script = ";".join(f"INSERT INTO T VALUES ({i})" for i in range(5))
+
+    async def steps(app, pilot):
+        app.query_one("#sql", TextArea).load_text(script)
+        await pilot.press("ctrl+e")
+        await app.workers.wait_for_complete()
+
+    run_script_app(lambda: conn, journal, steps)
+    assert conn.count("INSERT") == 4 and conn.rollbacks == 1
+    key, entry = journal.latest_incomplete()
+    assert entry["status"] == "failed" and entry["statement_index"] == 2
+    assert script[:entry["char_offset"]].endswith("VALUES (1);")
+    report = entry["reports"][-1]
+    assert report["failed_statement"] == 3 and report["error"].startswith("Commit failed: SQL0913")
+
+
+def test_no_second_run_while_a_script_is_running(tmp_path):
+    gate = threading.Event()
+
+    class GatedConnection(CannedConnection):
+        def cursor(self):
+            cursor = super().cursor()
+            execute = cursor.execute
+
+            def gated(sql, params=None):
+                if "SLOW" in sql:
+                    gate.wait(10)
+                execute(sql, params)
+            cursor.execute = gated
+            return cursor
+
+    conn = GatedConnection([("", [], [])])
+    journal = ScriptJournal(tmp_path / "journal.json")
+
+    async def steps(app, pilot):
+        app.query_one("#sql", TextArea).load_text("INSERT INTO SLOW VALUES (1);INSERT INTO T VALUES (2);")
+        await pilot.press("ctrl+e")
+        await pilot.pause()
+        assert app._script_running()
+        await pilot.press("ctrl+e", "ctrl+g")
+        assert sum("still running" in m for m in app.query_one(MessagePanel).messages) == 2
+
+        app.workers.cancel_group(app, "script")
+        gate.set()
+        for _ in range(100):
+            if journal.latest_incomplete()[1]["status"] != "running":
+                break
+            await asyncio.sleep(0.05)
+
+    run_script_app(lambda: conn, journal, steps)
+    assert conn.count("SLOW") == 1 and conn.count("INTO T") == 0
+    entry = journal.latest_incomplete()[1]
+    assert entry["status"] == "interrupted" and entry["statement_index"] == 1
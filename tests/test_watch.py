@@ -0,0 +1,30 @@
+import asyncio
+
+from db2tui import DB2Client, SqlApp
+from standin import CannedConnection
+
+
+def test_watch_runs_on_its_own_connection():
+    connections = []
+
+    def connect():
+        conn = CannedConnection([("FROM APP.ORDERS", ["ID", "STATUS"], [(1, "N"), (2, "H")])])
+        connections.append(conn)
+        return conn
+
+    async def run():
+        app = SqlApp()
+        app.client = DB2Client(connect)
+        async with app.run_test() as pilot:
+            app.current_sql = "SELECT ID, STATUS FROM APP.ORDERS"
+            app.action_toggle_watch()
+            app._watch_tick()
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            assert app.query_one("#results-table").row_count == 2
+            app.action_toggle_watch()
+
+    asyncio.run(run())
+    ui, *others = connections
+    assert ui.count("APP.ORDERS") == 0
+    assert [conn.count("APP.ORDERS") for conn in others].count(1) == 1